@@ -0,0 +1,259 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from statistics import median
+
+import numpy as np
+
+import preparation
+import table_preparing as prep
+from pipeline import load_outlier_rules
+from table import FilterRule
+
+
+BASE_COLUMNS = [
+    ('Глубина манометра', 'м', 3565.569, 125.853, 37),
+    ('Dшт', 'мм', 10.997, 2.487, 14),
+    ('Руст', 'бара', 229.598, 48.732, 0),
+    ('Рзаб', 'бара', 330.837, 63.325, 0),
+    ('Pлин', 'бара', 97.588, 12.43, 0),
+    ('Руст', 'бар', 228.768, 48.77, 0),
+    ('Рзаб', 'бар', 328.707, 64.404, 0),
+    ('Рлин', 'бар', 98.147, 9.772, 0),
+    ('Туст', ' С', 55.285, 10.93, 94),
+    ('Тна шлейфе', ' С', 40.334, 15.199, 0),
+    ('Тзаб', ' С', 105.305, 1.391, 0),
+    ('Tлин', ' С', 38.84, 9.062, 0),
+    ('Дебит газа', '1000 м3/сут', 382.87, 152.656, 0),
+    ('Дебит ст. конд.', 'м3/сут', 114.397, 58.689, 0),
+    ('Дебит воды', 'м3/сут', 2.407, 2.268, 0),
+    ('Дебит смеси', '1000 м3/сут', 405.781, 160.75, 0),
+    ('Дебит гааз', 'м3/сут', 3441.015, 2345.661, 0),
+    ('Дебит кон нестабильный', 'м3/сут', 177.871, 90.993, 0),
+    ('Дебит воды', 'м3/сут', 2.517, 2.313, 63),
+    ('Нэф', 'м', 48.478, 12.292, 25),
+    ('Рпл. Тек (послед точка на КВД)', 'МПа', 39.896, 5.306, 39),
+    ('Рпл. Тек (Расчет по КВД)', 'МПа', 51.279, 5.706, 34),
+    ('Рпл. Тек (Карноухов)', 'МПа', 52.077, 5.93, 24),
+    ('Pсб', ' атм', 94.988, 5.333, 113),
+    ('Pсб', ' бар', 93.746, 5.263, 113),
+    ('Ro_g', 'кг/м3', 0.808, 0.015, 6),
+    ('Ro_c', 'кг/м3', 780.848, 62.457, 25),
+    ('Ro_w', 'кг/м3', 1000.0, 0.0, 1),
+    ('Удельная плотность газа ', 'б/р', 0.665, 0.02, 12),
+]
+TARGET_COLUMNS = [
+    ('G_total', 'кг/с', 5.743, 2.067),
+    ('КГФ', 'г/м3', 265.028, 40.096),
+    ('КГФ', 'т/тыс.м3', 0.265, 0.04),
+]
+MISSING_VALUES = ['-', '#VALUE!', 'не спускался', '']
+
+DOT_DECIMAL_RATE = 0.01
+
+STARTUP_COMMANDS = {
+    'import_main': ['-c', 'import main'],
+    'cli_help': ['main.py', '--help'],
+}
+STAGES = ['get_table', 'find_categorical_columns', 'process_missing_values', 'remove_outliers',
+          'get_gain_ratio', 'get_correlation_map']
+
+
+def format_cell(value: float) -> str:
+    return f"{value:.2f}".replace('.', ',')
+
+
+def generate_column(rng: np.random.Generator, rows_count: int, mean: float, deviation: float,
+                    levels_count: int) -> np.ndarray:
+    if levels_count:
+        levels = np.round(mean + deviation * np.linspace(-2, 2, levels_count), 2)
+        return rng.choice(levels, rows_count)
+    return np.round(rng.normal(mean, deviation, rows_count), 2)
+
+
+def generate_data(output_file, rows_count: int, features_count: int = len(BASE_COLUMNS),
+                  missing_rate: float = 0.1, seed: int = 0, dot_decimal_rate: float = 0.0):
+    rng = np.random.default_rng(seed)
+    extra_columns_count = max(0, features_count - len(BASE_COLUMNS))
+    columns = BASE_COLUMNS[:features_count] + [(f'Параметр {i}', '', 100.0, 20.0, 0)
+                                                for i in range(extra_columns_count)]
+
+    features = [generate_column(rng, rows_count, mean, deviation, levels) for _, _, mean, deviation, levels in columns]
+    is_missing = [rng.random(rows_count) < missing_rate for _ in columns]
+    targets = [np.round(rng.normal(mean, deviation, rows_count), 3) for _, _, mean, deviation in TARGET_COLUMNS]
+    has_target = rng.random(rows_count) < 0.5
+    is_target_missing = [~has_target | (rng.random(rows_count) < 0.6),
+                         ~has_target | (rng.random(rows_count) < 0.3),
+                         ~has_target | (rng.random(rows_count) < 0.5)]
+    is_dot_decimal = np.zeros((len(columns) + len(TARGET_COLUMNS), rows_count), dtype=bool)
+    if dot_decimal_rate:
+        is_dot_decimal[0] = rng.random(rows_count) < dot_decimal_rate
+
+    writer = csv.writer(output_file, delimiter=';', lineterminator='\n')
+    names = [name for name, *_ in columns] + [name for name, *_ in TARGET_COLUMNS]
+    units = [unit for _, unit, *_ in columns] + [unit for _, unit, *_ in TARGET_COLUMNS]
+    writer.writerow([''] * (len(names) + 2))
+    writer.writerow(['', ''] + names)
+    writer.writerow(['№', 'дд.мм.гггг'] + units)
+    for row_index in range(rows_count):
+        cells = [str(row_index + 1), '01.01.10']
+        for values, missing, dot_decimal in zip(features + targets, is_missing + is_target_missing, is_dot_decimal):
+            if missing[row_index]:
+                cells.append(rng.choice(MISSING_VALUES))
+            else:
+                cell = format_cell(values[row_index])
+                cells.append(cell.replace(',', '.') if dot_decimal[row_index] else cell)
+        writer.writerow(cells)
+
+
+def get_outlier_rules(features_count: int) -> list[FilterRule]:
+    rules = []
+    for rule in load_outlier_rules():
+        index, name = rule.column_name[1:].split(') ', 1)
+        index = int(index)
+        if index >= len(BASE_COLUMNS):
+            index = index - len(BASE_COLUMNS) + features_count
+        elif index >= features_count:
+            continue
+        rules.append(FilterRule(f"({index}) {name}", rule.predicate, rule.lower_bound, rule.upper_bound))
+    return rules
+
+
+def run_pipeline(input_path: str, features_count: int) -> dict[str, float]:
+    timings = {}
+
+    def measure(stage: str, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    with open(input_path, 'r') as input_file:
+        table = measure('get_table', preparation.get_table, input_file)
+    measure('find_categorical_columns', preparation.find_categorical_columns, table, False)
+    measure('process_missing_values', preparation.process_missing_values, table, False)
+    measure('remove_outliers', preparation.remove_outliers, table, False, get_outlier_rules(features_count))
+    measure('get_gain_ratio', preparation.get_gain_ratio, table, False)
+    measure('get_correlation_map', preparation.get_correlation_map, table, False)
+    return timings
+
+
+def run_benchmark(rows_grid: list[int], features_grid: list[int], missing_rate: float, repeats: int) -> list[dict]:
+    results = []
+    logging.disable(logging.CRITICAL)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for rows_count in rows_grid:
+                for features_count in features_grid:
+                    input_path = os.path.join(directory, f'data_{rows_count}_{features_count}.csv')
+                    with open(input_path, 'w') as output_file:
+                        generate_data(output_file, rows_count, features_count, missing_rate)
+                    runs = [run_pipeline(input_path, features_count) for _ in range(repeats)]
+                    for stage in STAGES:
+                        results.append({'rows': rows_count, 'features': features_count, 'missing_rate': missing_rate,
+                                        'stage': stage, 'seconds': median(run[stage] for run in runs)})
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+
+def time_parsers(text: str) -> tuple[float, float]:
+    start = time.perf_counter()
+    cells_data = np.array(prep.get_data(list(csv.reader(io.StringIO(text), delimiter=';'))))
+    cells_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    input_file = io.StringIO(text)
+    bulk_data = prep.parse_data(input_file, len(prep.read_column_names(input_file)))
+    bulk_seconds = time.perf_counter() - start
+
+    if not np.array_equal(cells_data, bulk_data, equal_nan=True):
+        raise ValueError('Bulk parser result differs from process_cell')
+    return cells_seconds, bulk_seconds
+
+
+def run_parser_benchmark(rows_grid: list[int], features_grid: list[int], missing_rate: float,
+                         repeats: int) -> list[dict]:
+    results = []
+    for rows_count in rows_grid:
+        for features_count in features_grid:
+            output_file = io.StringIO()
+            generate_data(output_file, rows_count, features_count, missing_rate, dot_decimal_rate=DOT_DECIMAL_RATE)
+            runs = [time_parsers(output_file.getvalue()) for _ in range(repeats)]
+            for parser, index in (('process_cell', 0), ('parse_data', 1)):
+                results.append({'rows': rows_count, 'features': features_count, 'missing_rate': missing_rate,
+                                'stage': parser, 'seconds': median(run[index] for run in runs)})
+    return results
+
+
+def run_startup_benchmark(repeats: int) -> list[dict]:
+    results = []
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for stage, command in STARTUP_COMMANDS.items():
+        runs = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + command, cwd=directory, check=True, stdout=subprocess.DEVNULL)
+            runs.append(time.perf_counter() - start)
+        results.append({'rows': 0, 'features': 0, 'missing_rate': 0.0, 'stage': stage, 'seconds': median(runs)})
+    return results
+
+
+def get_result_key(result: dict) -> tuple:
+    return result['rows'], result['features'], result['missing_rate'], result['stage']
+
+
+def find_regressions(results: list[dict], baseline: list[dict], tolerance: float) -> list[dict]:
+    baseline_seconds = {get_result_key(result): result['seconds'] for result in baseline}
+    regressions = []
+    for result in results:
+        previous_seconds = baseline_seconds.get(get_result_key(result))
+        if previous_seconds is not None and result['seconds'] > previous_seconds * (1 + tolerance):
+            regressions.append(dict(result, baseline_seconds=previous_seconds))
+    return regressions
+
+
+def main_benchmark() -> int:
+    parser = argparse.ArgumentParser(description='Time the pipeline stages on synthetic well data')
+    parser.add_argument('--rows', type=int, nargs='+', default=[200, 2000, 20000])
+    parser.add_argument('--features', type=int, nargs='+', default=[len(BASE_COLUMNS), 100])
+    parser.add_argument('--missing-rate', type=float, default=0.1)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--baseline', help='previous output file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown')
+    parser.add_argument('--parsers', action='store_true', help='compare the cell-by-cell and bulk CSV parsers')
+    parser.add_argument('--startup', action='store_true', help='time the interpreter start and CLI import')
+    arguments = parser.parse_args()
+
+    if arguments.startup:
+        results = run_startup_benchmark(arguments.repeats)
+    else:
+        run = run_parser_benchmark if arguments.parsers else run_benchmark
+        results = run(arguments.rows, arguments.features, arguments.missing_rate, arguments.repeats)
+    with open(arguments.output, 'w') as output_file:
+        json.dump({'results': results}, output_file, indent=2)
+    for result in results:
+        print(f"{result['rows']:>8} rows {result['features']:>5} features  {result['stage']:<26} "
+              f"{result['seconds']:.4f} s")
+
+    if arguments.baseline:
+        with open(arguments.baseline, 'r') as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = find_regressions(results, baseline, arguments.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['rows']} rows {regression['features']} features {regression['stage']}: "
+                  f"{regression['seconds']:.4f} s (baseline {regression['baseline_seconds']:.4f} s)")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_benchmark())
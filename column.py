@@ -1,44 +1,85 @@
-import statistics
+from functools import cached_property
 
-from math import isnan, log, sqrt
-import matplotlib.pyplot as plt
+from math import log, sqrt
 import numpy as np
 
-import numpy
+from profiling import profiled
 
 
-def calculate_missing_rate(column: list) -> float:
-    valid_values = [element for element in column if not isnan(element)]
-    return round((1 - (len(valid_values) / len(column))) * 100, 3)
+def get_not_nan_values(column: np.ndarray) -> np.ndarray:
+    return column[~np.isnan(column)]
 
 
-def calculate_unique_elements_count(column: list) -> int:
-    unique_elements = set([element for element in column if not isnan(element)])
-    return len(unique_elements)
+def interpolate(previous_values: np.ndarray, next_values: np.ndarray, gamma: np.ndarray) -> np.ndarray:
+    difference = next_values - previous_values
+    return np.where(gamma >= 0.5, next_values - difference * (1 - gamma), previous_values + difference * gamma)
 
 
-def calculate_mode(column: list) -> float:
-    values = [value for value in column if not isnan(value)]
-    mode_elements = statistics.multimode(values)
-    mode = mode_elements[0]
-    return mode
-
+def calculate_sorted_quantile(sorted_matrix: np.ndarray, count: np.ndarray, number: int) -> np.ndarray:
+    columns = np.arange(sorted_matrix.shape[1])
+    virtual_indices = (np.maximum(count, 1) - 1) * (number * 25 / 100)
+    previous_indices = np.floor(virtual_indices).astype(np.intp)
+    next_indices = np.minimum(previous_indices + 1, np.maximum(count, 1) - 1)
+    gamma = virtual_indices - previous_indices
+    quantile = interpolate(sorted_matrix[previous_indices, columns], sorted_matrix[next_indices, columns], gamma)
+    return np.where(count > 0, quantile, np.nan)
 
-def calculate_mean(column: list) -> float:
-    values = [value for value in column if not isnan(value)]
-    mean = numpy.mean(values)
-    return mean
 
+def calculate_sorted_mode(matrix: np.ndarray, order: np.ndarray, sorted_matrix: np.ndarray,
+                          is_run_start: np.ndarray, count: np.ndarray) -> np.ndarray:
+    run_columns, run_rows = np.nonzero(is_run_start.T)
+    is_same_column = np.append(run_columns[1:] == run_columns[:-1], False)
+    run_ends = np.where(is_same_column, np.append(run_rows[1:], 0), count[run_columns])
+    run_lengths = run_ends - run_rows
+    first_positions = order[run_rows, run_columns]
 
-def calculate_variance(column: list) -> float:
-    values = [value for value in column if not isnan(value)]
-    variance = sqrt(np.var(values))
-    return variance
+    best_runs = np.lexsort((first_positions, -run_lengths, run_columns))
+    mode_columns, first_runs = np.unique(run_columns[best_runs], return_index=True)
+    mode = np.full(matrix.shape[1], np.nan)
+    mode[mode_columns] = sorted_matrix[run_rows[best_runs[first_runs]], mode_columns]
+    return mode
 
 
-def calculate_quantile(column: list, number: int) -> float:
-    values = [element for element in column if not isnan(element)]
-    return np.percentile(values, number * 25)
+def calculate_matrix_characteristics(matrix: np.ndarray) -> dict[str, np.ndarray]:
+    rows_count, columns_count = matrix.shape
+    is_valid = ~np.isnan(matrix)
+    count = is_valid.sum(axis=0)
+
+    order = np.argsort(matrix, axis=0, kind='stable')
+    sorted_matrix = np.take_along_axis(matrix, order, axis=0)
+    is_run_start = np.arange(rows_count)[:, np.newaxis] < count
+    is_run_start[1:] &= sorted_matrix[1:] != sorted_matrix[:-1]
+    unique_elements_count = is_run_start.sum(axis=0)
+
+    mean = np.full(columns_count, np.nan)
+    variance = np.full(columns_count, np.nan)
+    # np.mean and np.var per column keep the filling values bit-exact; a masked matrix sum rounds differently
+    for i in np.flatnonzero(count):
+        values = matrix[is_valid[:, i], i]
+        mean[i] = np.mean(values)
+        variance[i] = sqrt(np.var(values))
+
+    first_quantile = calculate_sorted_quantile(sorted_matrix, count, 1)
+    third_quantile = calculate_sorted_quantile(sorted_matrix, count, 3)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        unique_elements_percentage = unique_elements_count / count * 100
+    return {
+        'missing_rate': np.array([round((1 - (valid_count / rows_count)) * 100, 3) for valid_count in count]),
+        'unique_elements_count': unique_elements_count,
+        'unique_elements_percentage': unique_elements_percentage,
+        'mode': calculate_sorted_mode(matrix, order, sorted_matrix, is_run_start, count),
+        'mean': mean,
+        'variance': variance,
+        'first_quantile': first_quantile,
+        'third_quantile': third_quantile,
+        'lower_bound': first_quantile - 1.5 * (third_quantile - first_quantile),
+        'upper_bound': third_quantile + 1.5 * (third_quantile - first_quantile),
+    }
+
+
+def calculate_characteristics(column: np.ndarray) -> dict[str, float]:
+    characteristics = calculate_matrix_characteristics(np.asarray(column, dtype=np.float64).reshape(-1, 1))
+    return {name: values[0].item() for name, values in characteristics.items()}
 
 
 def is_categorical_variable(unique_values_percentage: float) -> bool:
@@ -46,54 +87,91 @@ def is_categorical_variable(unique_values_percentage: float) -> bool:
 
 
 class Column:
-    data: list
+    data: np.ndarray
 
     column_name: str
-    is_categorical: bool
 
-    missing_rate: float
-    unique_elements_count: int
-    unique_elements_percentage: float
-    mode: float
-    mean: float
-    variance: float
-    first_quantile: float
-    third_quantile: float
-
-    lower_bound: float
-    upper_bound: float
-
-    def __init__(self, data: list[float], column_name: str):
+    @profiled
+    def __init__(self, data: np.ndarray, column_name: str):
         self.column_name = column_name
+        self.data = np.asarray(data, dtype=np.float64)
+
+    def set_data(self, data: np.ndarray):
         self.data = data
-        self.__calculate_characteristics()
-
-    def __calculate_characteristics(self):
-        self.missing_rate = calculate_missing_rate(self.data)
-        self.unique_elements_count = calculate_unique_elements_count(self.data)
-        self.mode = calculate_mode(self.data)
-        self.mean = calculate_mean(self.data)
-        self.variance = calculate_variance(self.data)
-        self.first_quantile = calculate_quantile(self.data, 1)
-        self.third_quantile = calculate_quantile(self.data, 3)
-        self.unique_elements_percentage = (self.unique_elements_count / len(self.get_not_nan_elements())) * 100
-        self.is_categorical = is_categorical_variable(self.unique_elements_percentage)
-
-    def get_not_nan_elements(self) -> list:
-        return [element for element in self.data if not isnan(element)]
-
-    def fill_missing_values(self) -> bool:
-        if self.missing_rate != 0 and self.missing_rate < 30:
-            filling_value = self.mode if self.is_categorical else self.mean
-            for i in range(len(self.data)):
-                if isnan(self.data[i]):
-                    self.data[i] = filling_value
-            self.missing_rate = calculate_missing_rate(self.data)
+        self.invalidate_characteristics()
+
+    def set_characteristics(self, characteristics: dict[str, float]):
+        self.__dict__['characteristics'] = characteristics
+
+    def invalidate_characteristics(self):
+        self.__dict__.pop('characteristics', None)
+
+    @cached_property
+    def characteristics(self) -> dict[str, float]:
+        return calculate_characteristics(self.data)
+
+    @property
+    def missing_rate(self) -> float:
+        return self.characteristics['missing_rate']
+
+    @property
+    def unique_elements_count(self) -> int:
+        return self.characteristics['unique_elements_count']
+
+    @property
+    def unique_elements_percentage(self) -> float:
+        return self.characteristics['unique_elements_percentage']
+
+    @property
+    def is_categorical(self) -> bool:
+        return is_categorical_variable(self.unique_elements_percentage)
+
+    @property
+    def mode(self) -> float:
+        return self.characteristics['mode']
+
+    @property
+    def mean(self) -> float:
+        return self.characteristics['mean']
+
+    @property
+    def variance(self) -> float:
+        return self.characteristics['variance']
+
+    @property
+    def first_quantile(self) -> float:
+        return self.characteristics['first_quantile']
+
+    @property
+    def third_quantile(self) -> float:
+        return self.characteristics['third_quantile']
+
+    def get_missing_mask(self) -> np.ndarray:
+        return np.isnan(self.data)
+
+    def get_not_nan_elements(self) -> np.ndarray:
+        return get_not_nan_values(self.data)
+
+    def is_fillable(self) -> bool:
+        return self.missing_rate != 0 and self.missing_rate < 30
+
+    def fill_missing_values(self, filling_values: np.ndarray | None = None) -> bool:
+        if self.is_fillable():
+            if filling_values is None:
+                filling_values = self.mode if self.is_categorical else self.mean
+            self.data[self.get_missing_mask()] = filling_values
+            self.invalidate_characteristics()
             return True
         return False
 
+    def get_histogram(self) -> tuple[np.ndarray, np.ndarray]:
+        bins_count = int(1 + log(len(self.data), 2))
+        return np.histogram(self.get_not_nan_elements(), bins=bins_count)
+
     def figure_histogram(self):
-        sorted_data = sorted(self.data)
+        import matplotlib.pyplot as plt
+
+        sorted_data = np.sort(self.data)
         bins_count = int(1 + log(len(sorted_data), 2))
         plt.hist(sorted_data, bins=bins_count, density=False)
         plt.title(self.column_name)
@@ -106,21 +184,18 @@ class Column:
         plt.show()
 
     def get_lower_bound(self) -> float:
-        bound = self.first_quantile - 1.5 * (self.third_quantile - self.first_quantile)
-        return bound
+        return self.characteristics['lower_bound']
 
     def get_upper_bound(self) -> float:
-        bound = self.third_quantile + 1.5 * (self.third_quantile - self.first_quantile)
-        return bound
+        return self.characteristics['upper_bound']
 
     def get_name(self) -> str:
         return self.column_name
 
-    def normalize(self):
-        min_value = min(self.data)
-        max_value = max(self.data)
-        prepared_data = []
-        for value in self.data:
-            prepared_value = (value - min_value) / (max_value - min_value)
-            prepared_data.append(prepared_value)
-        self.data = prepared_data
+    def normalize(self) -> tuple[float, float]:
+        min_value = float(np.nanmin(self.data))
+        max_value = float(np.nanmax(self.data))
+        self.data -= min_value
+        self.data /= max_value - min_value
+        self.invalidate_characteristics()
+        return min_value, max_value
@@ -0,0 +1,34 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+
+MATRIX_FILE = 'matrix.npy'
+MISSING_MASK_FILE = 'missing.npy'
+COLUMNS_FILE = 'columns.json'
+
+
+def save_columns(path: str, column_names: list[str], matrix: np.ndarray, metadata: dict | None = None):
+    temporary_path = f"{path}.tmp{os.getpid()}"
+    os.makedirs(temporary_path)
+    try:
+        np.save(os.path.join(temporary_path, MATRIX_FILE), np.asfortranarray(matrix, dtype=np.float64))
+        np.save(os.path.join(temporary_path, MISSING_MASK_FILE), np.asfortranarray(np.isnan(matrix)))
+        with open(os.path.join(temporary_path, COLUMNS_FILE), 'w') as columns_file:
+            json.dump({'column_names': column_names, 'metadata': metadata or {}}, columns_file, ensure_ascii=False)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(temporary_path, path)
+    except BaseException:
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        raise
+
+
+def load_columns(path: str, mmap_mode: str | None = 'c') -> tuple[list[str], np.ndarray, np.ndarray, dict]:
+    with open(os.path.join(path, COLUMNS_FILE), 'r') as columns_file:
+        columns = json.load(columns_file)
+    matrix = np.load(os.path.join(path, MATRIX_FILE), mmap_mode=mmap_mode)
+    missing_mask = np.load(os.path.join(path, MISSING_MASK_FILE), mmap_mode=mmap_mode)
+    return columns['column_names'], matrix, missing_mask, columns['metadata']
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+def get_correlation_sums(matrix: np.ndarray, mean: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    is_valid = ~np.isnan(matrix)
+    valid = is_valid.astype(np.float64)
+    with np.errstate(invalid='ignore'):
+        centered = np.where(is_valid, matrix - mean, 0.0)
+    return valid.T @ valid, centered.T @ centered, centered.T @ valid, (centered * centered).T @ valid
+
+
+def get_correlation_from_sums(count: np.ndarray, sum_products: np.ndarray, sums: np.ndarray,
+                              sums_of_squares: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = sum_products - sums * sums.T / count
+        variance = sums_of_squares - sums * sums / count
+        correlation = covariance / np.sqrt(variance * variance.T)
+
+    correlation[(count == 0) | ~(variance > 0) | ~(variance.T > 0)] = np.nan
+    return np.clip(correlation, -1, 1)
+
+
+def get_correlation_matrix(matrix: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nanmean(matrix, axis=0)
+    return get_correlation_from_sums(*get_correlation_sums(matrix, mean))
+
+
+def is_components(first_indices: np.ndarray, second_indices: np.ndarray, correlation_matrix: np.ndarray,
+                  columns_count: int, threshold: float = 0.3) -> np.ndarray:
+    first_rows = correlation_matrix[first_indices, :columns_count]
+    second_rows = correlation_matrix[second_indices, :columns_count]
+    is_different = np.abs(first_rows - second_rows) > threshold
+
+    other_columns = np.arange(columns_count)
+    is_different &= other_columns != first_indices[:, np.newaxis]
+    is_different &= other_columns != second_indices[:, np.newaxis]
+    return is_different.any(axis=1)
+
+
+def find_redundant_pairs(correlation_matrix: np.ndarray, columns_count: int, correlation_threshold: float = 0.85,
+                         components_threshold: float = 0.3) -> list[tuple[int, int, float]]:
+    correlation = correlation_matrix[:columns_count, :columns_count]
+    is_correlated = np.tril(correlation > correlation_threshold, k=-1)
+    first_indices, second_indices = np.nonzero(is_correlated)
+
+    is_redundant = ~is_components(first_indices, second_indices, correlation_matrix, columns_count,
+                                  components_threshold)
+    return [(int(first), int(second), float(correlation[first, second]))
+            for first, second in zip(first_indices[is_redundant], second_indices[is_redundant])]
@@ -0,0 +1,419 @@
+import json
+import logging
+import os
+import shutil
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from add import print_list
+from column import is_categorical_variable
+from correlation import get_correlation_from_sums, get_correlation_sums
+from gain_ratio import (EQUAL_WIDTH, TargetEncoding, calculate_contingency_gain_ratio, get_class_indices,
+                        get_contingency_table, get_equal_width_classes, get_target_product_indices)
+from imputation import STATISTIC
+from preprocessing import Preprocessor
+from running_statistics import RunningStatistics, get_hashes
+from table import PAGE_SIZE, PRINTED_ROWS_LIMIT, FilterRule, Table
+from writers import write_csv
+
+
+BLOCK_CELLS = 1 << 24
+COLUMNS_FILE = 'columns.json'
+SELECTION_FILE = 'selection.bool'
+TARGET_CODES_FILE = 'target_codes.i8'
+DISTINCT_DIRECTORY = 'distinct'
+
+
+def get_block_size(columns_count: int) -> int:
+    return max(1, BLOCK_CELLS // max(1, columns_count))
+
+
+def get_column_file(index: int) -> str:
+    return f'column_{index}.f8'
+
+
+def open_array(path: str, dtype, rows_count: int, mode: str = 'r+') -> np.ndarray:
+    if rows_count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode=mode, shape=(rows_count,))
+
+
+def write_description(path: str, description: dict):
+    temporary_file = os.path.join(path, f'{COLUMNS_FILE}.tmp{os.getpid()}')
+    with open(temporary_file, 'w') as columns_file:
+        json.dump(description, columns_file, ensure_ascii=False)
+    os.replace(temporary_file, os.path.join(path, COLUMNS_FILE))
+
+
+def create_disk_table(path: str, column_names: list[str], chunks: Iterable[np.ndarray],
+                      target_variables_count: int) -> 'DiskTable':
+    if os.path.isdir(path) and os.listdir(path) and not os.path.isfile(os.path.join(path, COLUMNS_FILE)):
+        raise ValueError(f"Directory '{path}' is not empty and does not hold a disk table")
+    temporary_path = f"{path}.tmp{os.getpid()}"
+    os.makedirs(temporary_path)
+    try:
+        column_files = [get_column_file(i) for i in range(len(column_names))]
+        outputs = [open(os.path.join(temporary_path, column_file), 'wb') for column_file in column_files]
+        rows_count = 0
+        try:
+            for chunk in chunks:
+                for i in range(len(outputs)):
+                    np.ascontiguousarray(chunk[:, i], dtype=np.float64).tofile(outputs[i])
+                rows_count += len(chunk)
+        finally:
+            for output in outputs:
+                output.close()
+
+        with open(os.path.join(temporary_path, SELECTION_FILE), 'wb') as selection_file:
+            for start in range(0, rows_count, BLOCK_CELLS):
+                np.ones(min(BLOCK_CELLS, rows_count - start), dtype=bool).tofile(selection_file)
+        write_description(temporary_path, {'column_names': column_names, 'column_files': column_files,
+                                           'target_variables_count': target_variables_count,
+                                           'rows_count': rows_count})
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(temporary_path, path)
+    except BaseException:
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        raise
+    return DiskTable(path)
+
+
+class DiskTable:
+    path: str
+    column_names: list[str]
+    column_files: list[str]
+    target_variables_count: int
+    rows_count: int
+    selection: np.ndarray
+    columns: list[np.ndarray]
+    filter_rules: list[FilterRule]
+    preprocessor: Preprocessor
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, COLUMNS_FILE), 'r') as columns_file:
+            description = json.load(columns_file)
+        self.column_names = description['column_names']
+        self.column_files = description['column_files']
+        self.target_variables_count = description['target_variables_count']
+        self.rows_count = description['rows_count']
+        self.selection = open_array(os.path.join(path, SELECTION_FILE), bool, self.rows_count)
+        self.columns = [open_array(os.path.join(path, column_file), np.float64, self.rows_count)
+                        for column_file in self.column_files]
+        self.filter_rules = []
+        self.preprocessor = Preprocessor(self.column_names, self.target_variables_count)
+        self.__statistics = None
+        self.__gain_ratio_cache = {}
+
+    def invalidate(self):
+        self.__statistics = None
+        self.__gain_ratio_cache.clear()
+
+    def save(self):
+        for array in [self.selection] + self.columns:
+            if isinstance(array, np.memmap):
+                array.flush()
+        write_description(self.path, {'column_names': self.column_names, 'column_files': self.column_files,
+                                      'target_variables_count': self.target_variables_count,
+                                      'rows_count': self.rows_count})
+
+    def get_blocks(self) -> Iterator[slice]:
+        block_size = get_block_size(len(self.columns))
+        for start in range(0, self.rows_count, block_size):
+            yield slice(start, min(start + block_size, self.rows_count))
+
+    def read_block(self, block: slice, indices: Iterable[int]) -> np.ndarray:
+        selection = self.selection[block]
+        indices = list(indices)
+        data = np.empty((int(np.count_nonzero(selection)), len(indices)))
+        for i in range(len(indices)):
+            data[:, i] = self.columns[indices[i]][block][selection]
+        return data
+
+    def get_selected_rows_count(self) -> int:
+        return sum(int(np.count_nonzero(self.selection[block])) for block in self.get_blocks())
+
+    def get_column_names(self) -> list[str]:
+        return self.column_names
+
+    def get_shape(self) -> tuple[int, int]:
+        return self.get_selected_rows_count(), len(self.columns)
+
+    def get_statistics(self) -> RunningStatistics:
+        if self.__statistics is None:
+            statistics = RunningStatistics(self.column_names)
+            for block in self.get_blocks():
+                statistics.update(self.read_block(block, range(len(self.columns))))
+            self.__statistics = statistics
+        return self.__statistics
+
+    def get_missing_rate(self) -> list[float]:
+        return self.get_statistics().get_missing_rate()
+
+    def get_unique_elements_count(self) -> list[int]:
+        return self.get_statistics().get_unique_elements_count()
+
+    def get_unique_elements_percentage(self) -> list[float]:
+        statistics = self.get_statistics()
+        return [count / valid_count * 100 if valid_count else float('nan')
+                for count, valid_count in zip(statistics.get_unique_elements_count(), statistics.count)]
+
+    def get_mean(self) -> list[float]:
+        return self.get_statistics().get_mean()
+
+    def get_unique_values(self, index: int) -> np.ndarray:
+        unique_values = np.empty(0)
+        for block in self.get_blocks():
+            values = self.read_block(block, [index])[:, 0]
+            unique_values = np.union1d(unique_values, values[~np.isnan(values)])
+        return unique_values
+
+    def count_distinct_values(self, index: int) -> int:
+        buckets_count = max(1, -(-self.get_selected_rows_count() // BLOCK_CELLS))
+        directory = os.path.join(self.path, DISTINCT_DIRECTORY)
+        os.makedirs(directory, exist_ok=True)
+        try:
+            bucket_files = [os.path.join(directory, f'bucket_{i}.f8') for i in range(buckets_count)]
+            outputs = [open(bucket_file, 'wb') for bucket_file in bucket_files]
+            try:
+                for block in self.get_blocks():
+                    values = self.read_block(block, [index])[:, 0]
+                    values = np.unique(values[~np.isnan(values)]) + 0.0
+                    buckets = (get_hashes(values) % np.uint64(buckets_count)).astype(np.intp)
+                    order = np.argsort(buckets, kind='stable')
+                    bounds = np.searchsorted(buckets[order], np.arange(buckets_count + 1))
+                    for i in np.unique(buckets):
+                        values[order[bounds[i]:bounds[i + 1]]].tofile(outputs[i])
+            finally:
+                for output in outputs:
+                    output.close()
+            return sum(len(np.unique(np.fromfile(bucket_file))) for bucket_file in bucket_files)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def get_equal_width_classes(self, index: int) -> dict[int, tuple[float, float]]:
+        min_value, max_value = self.get_ranges([index])[0]
+        return get_equal_width_classes(min_value, max_value, self.count_distinct_values(index))
+
+    def get_modes(self, indices: list[int]) -> list[float]:
+        values = [np.empty(0) for _ in indices]
+        counts = [np.empty(0, dtype=np.int64) for _ in indices]
+        first_positions = [np.empty(0, dtype=np.int64) for _ in indices]
+        offset = 0
+        for block in self.get_blocks():
+            data = self.read_block(block, indices)
+            for i in range(len(indices)):
+                is_valid = ~np.isnan(data[:, i])
+                block_values, block_positions, block_counts = np.unique(data[is_valid, i], return_index=True,
+                                                                        return_counts=True)
+                merged_values, inverse = np.unique(np.concatenate((values[i], block_values)), return_inverse=True)
+                merged_counts = np.zeros(len(merged_values), dtype=np.int64)
+                np.add.at(merged_counts, inverse, np.concatenate((counts[i], block_counts)))
+                merged_positions = np.full(len(merged_values), np.iinfo(np.int64).max)
+                block_positions = offset + np.flatnonzero(is_valid)[block_positions]
+                np.minimum.at(merged_positions, inverse, np.concatenate((first_positions[i], block_positions)))
+                values[i], counts[i], first_positions[i] = merged_values, merged_counts, merged_positions
+            offset += len(data)
+        return [float(values[i][np.lexsort((first_positions[i], -counts[i]))[0]]) if len(values[i]) else float('nan')
+                for i in range(len(indices))]
+
+    def get_ranges(self, indices: list[int]) -> list[tuple[float, float]]:
+        min_values = np.full(len(indices), np.nan)
+        max_values = np.full(len(indices), np.nan)
+        for block in self.get_blocks():
+            data = self.read_block(block, indices)
+            if len(data):
+                min_values = np.fmin(min_values, np.fmin.reduce(data, axis=0))
+                max_values = np.fmax(max_values, np.fmax.reduce(data, axis=0))
+        return list(zip(min_values.tolist(), max_values.tolist()))
+
+    def find_categorical_columns(self) -> list[str]:
+        categorical_columns = [name for name, percentage in zip(self.column_names, self.get_unique_elements_percentage())
+                               if is_categorical_variable(percentage)]
+        self.preprocessor.categorical_columns = categorical_columns
+        logging.warning(f"Find {len(categorical_columns)} categorical columns (< 24% unique values): {print_list(categorical_columns, ', ')}")
+        return categorical_columns
+
+    def fill_missing_values(self, method: str = STATISTIC):
+        if method != STATISTIC:
+            raise ValueError(f"Filling method '{method}' is not available out of core")
+        statistics = self.get_statistics()
+        off_target_variables_count = len(self.columns) - self.target_variables_count
+        missing_rate = statistics.get_missing_rate()
+        percentage = self.get_unique_elements_percentage()
+        filled_indices = [i for i in range(off_target_variables_count) if missing_rate[i] != 0 and missing_rate[i] < 30]
+        categorical_indices = [i for i in filled_indices if is_categorical_variable(percentage[i])]
+        filling_values = dict(zip(categorical_indices, self.get_modes(categorical_indices)))
+        mean = statistics.get_mean()
+        for i in filled_indices:
+            filling_value = filling_values.get(i, mean[i])
+            self.preprocessor.filling_values[self.column_names[i]] = filling_value
+            for block in self.get_blocks():
+                data = self.columns[i][block]
+                data[self.selection[block] & np.isnan(data)] = filling_value
+        self.invalidate()
+        self.save()
+        filled_columns_names = [self.column_names[i] for i in filled_indices]
+        logging.info(f"Missing values of columns {print_list(filled_columns_names, ', ')} were filled")
+
+    def delete_column(self, index: int) -> str:
+        column_name = self.column_names.pop(index)
+        column_file = self.column_files.pop(index)
+        self.columns.pop(index)
+        self.save()
+        os.remove(os.path.join(self.path, column_file))
+        self.invalidate()
+        return column_name
+
+    def __filter_columns(self, is_kept: list[bool]) -> list[str]:
+        off_target_variables_count = len(self.columns) - self.target_variables_count
+        deleted_indices = [i for i in range(off_target_variables_count) if not is_kept[i]]
+        return [self.delete_column(i) for i in reversed(deleted_indices)][::-1]
+
+    def delete_half_empty_columns(self):
+        threshold_missing_rate = 60
+        deleted_columns_names = self.__filter_columns([rate < threshold_missing_rate
+                                                       for rate in self.get_missing_rate()])
+        logging.warning(f"Columns {print_list(deleted_columns_names, ', ')} "
+                        f"(with missing rate > {threshold_missing_rate})  were deleted")
+
+    def delete_static_columns(self):
+        deleted_columns_names = self.__filter_columns([count > 1 for count in self.get_unique_elements_count()])
+        logging.warning(f"Static columns {print_list(deleted_columns_names, ', ')} "
+                        f"(with single unique element)  were deleted")
+
+    def add_filter_rule(self, rule: FilterRule):
+        self.column_names.index(rule.column_name)
+        self.filter_rules.append(rule)
+
+    def apply_filter_rules(self) -> list[tuple[FilterRule, int]]:
+        deleted_rows_count = [0] * len(self.filter_rules)
+        rule_columns = [self.columns[self.column_names.index(rule.column_name)] for rule in self.filter_rules]
+        first_target_column = self.columns[len(self.columns) - self.target_variables_count]
+        for block in self.get_blocks():
+            keep_mask = np.array(self.selection[block])
+            is_target_missing = np.isnan(first_target_column[block])
+            for i, (rule, column) in enumerate(zip(self.filter_rules, rule_columns)):
+                is_deleted = keep_mask & is_target_missing & ~rule.is_satisfied(column[block])
+                deleted_rows_count[i] += int(np.count_nonzero(is_deleted))
+                keep_mask &= ~is_deleted
+            self.selection[block] = keep_mask
+        deleted_rows_count = list(zip(self.filter_rules, deleted_rows_count))
+        self.preprocessor.filter_rules.extend(self.filter_rules)
+        self.filter_rules.clear()
+        self.invalidate()
+        self.save()
+        return deleted_rows_count
+
+    def normalize(self):
+        ranges = self.get_ranges(list(range(len(self.columns))))
+        for name, column, (min_value, max_value) in zip(self.column_names, self.columns, ranges):
+            self.preprocessor.normalization_bounds[name] = (min_value, max_value)
+            for block in self.get_blocks():
+                data = column[block]
+                data -= min_value
+                data /= max_value - min_value
+        self.invalidate()
+        self.save()
+
+    def encode_target(self) -> TargetEncoding:
+        target_indices = [len(self.columns) - 2, len(self.columns) - 1]
+        first_column_unique_values = self.get_unique_values(target_indices[0])
+        second_column_classes = self.get_equal_width_classes(target_indices[1])
+
+        occupied_cells = np.empty(0, dtype=np.int64)
+        for block in self.get_blocks():
+            product_indices = get_target_product_indices(self.read_block(block, target_indices),
+                                                         first_column_unique_values, second_column_classes)
+            occupied_cells = np.union1d(occupied_cells, product_indices[product_indices >= 0])
+
+        selected_rows_count = self.get_selected_rows_count()
+        codes = open_array(os.path.join(self.path, TARGET_CODES_FILE), np.int64, selected_rows_count, 'w+')
+        target_freq = np.zeros(len(occupied_cells), dtype=np.int64)
+        offset = 0
+        for block in self.get_blocks():
+            product_indices = get_target_product_indices(self.read_block(block, target_indices),
+                                                         first_column_unique_values, second_column_classes)
+            is_valid = product_indices >= 0
+            block_codes = np.full(len(product_indices), -1, dtype=np.int64)
+            block_codes[is_valid] = np.searchsorted(occupied_cells, product_indices[is_valid])
+            codes[offset:offset + len(block_codes)] = block_codes
+            target_freq += np.bincount(block_codes[is_valid], minlength=len(occupied_cells))
+            offset += len(block_codes)
+        return TargetEncoding(codes, len(occupied_cells), target_freq)
+
+    def get_gain_ratios(self, workers: int = 1, discretization: str = EQUAL_WIDTH) -> dict[str, float]:
+        if discretization != EQUAL_WIDTH:
+            raise ValueError(f"Discretization '{discretization}' needs the whole sorted column "
+                             f"and is not available out of core")
+        if discretization not in self.__gain_ratio_cache:
+            self.__gain_ratio_cache[discretization] = self.__calculate_gain_ratios()
+        return dict(self.__gain_ratio_cache[discretization])
+
+    def __calculate_gain_ratios(self) -> dict[str, float]:
+        target = self.encode_target()
+        input_indices = list(range(len(self.columns) - self.target_variables_count))
+        input_classes = [self.get_equal_width_classes(i) for i in input_indices]
+        input_freq = [np.zeros(len(classes), dtype=np.int64) for classes in input_classes]
+        contingency_tables = [np.zeros((len(classes), target.classes_count), dtype=np.int64)
+                              for classes in input_classes]
+
+        offset = 0
+        for block in self.get_blocks():
+            data = self.read_block(block, input_indices)
+            target_indices = np.asarray(target.indices[offset:offset + len(data)])
+            for i in range(len(input_indices)):
+                class_indices = get_class_indices(data[:, i], input_classes[i])
+                input_freq[i] += np.bincount(class_indices[class_indices >= 0], minlength=len(input_classes[i]))
+                contingency_tables[i] += get_contingency_table(class_indices, len(input_classes[i]), target_indices,
+                                                               target.classes_count)
+            offset += len(data)
+
+        return {self.column_names[i]: calculate_contingency_gain_ratio(input_freq[i], contingency_tables[i],
+                                                                       len(target.indices), target.info)
+                for i in range(len(input_indices))}
+
+    def get_gain_ratio_significance(self, *args, **kwargs):
+        raise ValueError("Permutation significance needs the columns in memory and is not available out of core")
+
+    def get_correlation_table(self) -> np.ndarray:
+        mean = np.array(self.get_mean())
+        sums = None
+        for block in self.get_blocks():
+            block_sums = get_correlation_sums(self.read_block(block, range(len(self.columns))), mean)
+            sums = block_sums if sums is None else [total + part for total, part in zip(sums, block_sums)]
+        if sums is None:
+            sums = get_correlation_sums(np.empty((0, len(self.columns))), mean)
+        return get_correlation_from_sums(*sums)
+
+    def print_full_table(self, rows_limit: int | None = PRINTED_ROWS_LIMIT, page_size: int = PAGE_SIZE):
+        from tabulate import tabulate
+
+        printed_rows_count = 0
+        for block in self.get_blocks():
+            data = self.read_block(block, range(len(self.columns)))
+            if rows_limit is not None:
+                data = data[:rows_limit - printed_rows_count]
+            for start in range(0, len(data), page_size):
+                print(tabulate(data[start:start + page_size], self.column_names, tablefmt="grid"))
+            printed_rows_count += len(data)
+            if rows_limit is not None and printed_rows_count >= rows_limit:
+                break
+        selected_rows_count = self.get_selected_rows_count()
+        if printed_rows_count < selected_rows_count:
+            print(f"... {selected_rows_count - printed_rows_count} more rows")
+
+    def get_preprocessor(self) -> Preprocessor:
+        self.preprocessor.kept_columns = list(self.column_names)
+        return self.preprocessor
+
+    def save_in_file(self, filename: str):
+        write_csv(filename, self.column_names,
+                  (self.read_block(block, range(len(self.columns))) for block in self.get_blocks()))
+
+    def to_table(self) -> Table:
+        blocks = [self.read_block(block, range(len(self.columns))) for block in self.get_blocks()]
+        data = np.concatenate(blocks) if blocks else np.empty((0, len(self.columns)))
+        return Table(data, list(self.column_names), self.target_variables_count)
@@ -0,0 +1,37 @@
+from typing import Callable
+
+import numpy as np
+
+
+class FilterRule:
+    column_name: str
+    predicate: Callable[[float], bool] | None
+    lower_bound: float | None
+    upper_bound: float | None
+
+    def __init__(self, column_name: str, predicate: Callable[[float], bool] | None = None,
+                 lower_bound: float | None = None, upper_bound: float | None = None):
+        self.column_name = column_name
+        self.predicate = predicate
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+
+    def __str__(self) -> str:
+        if self.predicate is not None:
+            return f"{self.column_name} (custom predicate)"
+        description = self.column_name
+        if self.lower_bound is not None:
+            description = f"{self.lower_bound} < {description}"
+        if self.upper_bound is not None:
+            description = f"{description} < {self.upper_bound}"
+        return description
+
+    def is_satisfied(self, values: np.ndarray) -> np.ndarray:
+        if self.predicate is not None:
+            return np.fromiter((self.predicate(value) for value in values), dtype=bool, count=len(values))
+        is_satisfied = np.ones(len(values), dtype=bool)
+        if self.lower_bound is not None:
+            is_satisfied &= values > self.lower_bound
+        if self.upper_bound is not None:
+            is_satisfied &= values < self.upper_bound
+        return is_satisfied
@@ -1,14 +1,15 @@
-from math import log, isnan
+from concurrent.futures import ProcessPoolExecutor
+from math import log
+from multiprocessing.shared_memory import SharedMemory
 
+import numpy as np
 
-def get_classes(data: list[float]) -> dict[int, tuple[float, float]]:
-    dictionary = {}
+from profiling import profiled
 
-    unique_values = set([value for value in data if not isnan(value)])
-    size = len(unique_values)
+
+def get_equal_width_classes(min_value: float, max_value: float, size: int) -> dict[int, tuple[float, float]]:
+    dictionary = {}
     class_count = 1 + int(log(size, 2))
-    max_value = max(unique_values)
-    min_value = min(unique_values)
     step = (max_value - min_value) / class_count
 
     previous_value = min_value
@@ -23,111 +24,266 @@ def get_classes(data: list[float]) -> dict[int, tuple[float, float]]:
     return dictionary
 
 
-def get_target_classes(data: list[tuple[float, float]]) -> dict[int, tuple[float, tuple[float, float]]]:
-    dictionary = {}
-    second_column_classes = get_classes([tuple_value[1] for tuple_value in data])
-    first_column_unique_values = set([tuple_value[0] for tuple_value in data if not isnan(tuple_value[0])])
-
-    index = 0
-    for val in first_column_unique_values:
-        for i in range(len(second_column_classes.values())):
-            dictionary[index] = (val, second_column_classes[i])
-            index += 1
-    return dictionary
-
+def get_classes(data: list[float]) -> dict[int, tuple[float, float]]:
+    values = np.asarray(data, dtype=np.float64)
+    unique_values = np.unique(values[~np.isnan(values)])
+    return get_equal_width_classes(float(unique_values[0]), float(unique_values[-1]), len(unique_values))
 
-def calculate_freq(data: list[float], bounds: tuple[float, float]) -> int:
-    freq = 0
-    for value in data:
-        if is_belong_to_class(value, bounds):
-            freq += 1
-    return freq
 
+def get_class_indices(data, classes: dict[int, tuple[float, float]], is_strict: bool = False) -> np.ndarray:
+    values = np.asarray(data, dtype=np.float64)
+    lower_bounds = np.array([classes[i][0] for i in range(len(classes))])
+    upper_bounds = np.array([classes[i][1] for i in range(len(classes))])
 
-def part_of_i(freq: int, data_capacity: int) -> float:
-    prop = freq / data_capacity
-    return -1 * prop * log(prop, 2)
+    side = 'left' if is_strict else 'right'
+    indices = np.searchsorted(lower_bounds, values, side=side) - 1
+    is_valid = indices >= 0
+    is_valid[is_valid] = values[is_valid] < upper_bounds[indices[is_valid]]
+    indices[~is_valid] = -1
+    return indices
 
 
-def calculate_target_info(target_columns: list[tuple[float, float]]) -> float:
-    target_classes = get_target_classes(target_columns)
-    result = 0
+def get_target_product_indices(target: np.ndarray, first_column_unique_values: np.ndarray,
+                               second_column_classes: dict[int, tuple[float, float]]) -> np.ndarray:
+    second_column_indices = get_class_indices(target[:, 1], second_column_classes, is_strict=True)
+    first_column = target[:, 0]
+    first_column_indices = np.searchsorted(first_column_unique_values, first_column)
 
-    for i in range(len(target_classes.values())):
-        target_class_bounds = target_classes[i]
-        total_count = 0
-        current_freq = 0
-        for row in target_columns:
-            total_count += 1
-            if is_belong_to_target_class(row, target_class_bounds):
-                current_freq += 1
-        if current_freq != 0:
-            result += part_of_i(current_freq, total_count)
-    return result
+    product_indices = first_column_indices * len(second_column_classes) + second_column_indices
+    product_indices[np.isnan(first_column) | (second_column_indices < 0)] = -1
+    return product_indices
 
 
-def calculate_column_info(column: list[float]) -> float:
-    column_classes = get_classes(column)
-    result = 0
+def get_target_class_indices(target_columns) -> tuple[np.ndarray, int]:
+    target = np.asarray(target_columns, dtype=np.float64).reshape(-1, 2)
+    first_column_unique_values = np.unique(target[~np.isnan(target[:, 0]), 0])
+    product_indices = get_target_product_indices(target, first_column_unique_values, get_classes(target[:, 1]))
 
-    for i in range(len(column_classes.values())):
-        target_class_bounds = column_classes[i]
-        total_count = 0
-        current_freq = 0
-        for row in column:
-            total_count += 1
-            if is_belong_to_class(row, target_class_bounds):
-                current_freq += 1
-        if current_freq != 0:
-            result += part_of_i(current_freq, total_count)
-    return result
+    is_valid = product_indices >= 0
+    occupied_cells, codes = np.unique(product_indices[is_valid], return_inverse=True)
+    indices = np.full(len(target), -1, dtype=np.int64)
+    indices[is_valid] = codes
+    return indices, len(occupied_cells)
 
 
-def calculate_info(input_column: list[float], input_class_bounds : tuple[float, float], target_columns: list[tuple[float, float]]) -> float:
-    target_classes = get_target_classes(target_columns)
-    result = 0
-    for i in range(len(target_classes.values())):
-        target_class_bounds = target_classes[i]
+def get_contingency_table(input_indices: np.ndarray, input_classes_count: int,
+                          target_indices: np.ndarray, target_classes_count: int) -> np.ndarray:
+    is_valid = (input_indices >= 0) & (target_indices >= 0)
+    joint_indices = input_indices[is_valid] * target_classes_count + target_indices[is_valid]
+    counts = np.bincount(joint_indices, minlength=input_classes_count * target_classes_count)
+    return counts.reshape(input_classes_count, target_classes_count)
+
+
+def calculate_entropy(freq: np.ndarray, data_capacity) -> np.ndarray:
+    freq = np.asarray(freq, dtype=np.float64)
+    data_capacity = np.asarray(data_capacity, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prop = freq / data_capacity[..., np.newaxis]
+        parts = np.where(freq > 0, -1 * prop * np.log2(prop), 0.0)
+    return parts.sum(axis=-1)
+
+
+class TargetEncoding:
+    indices: np.ndarray
+    classes_count: int
+    info: float
+
+    def __init__(self, indices: np.ndarray, classes_count: int, target_freq: np.ndarray | None = None):
+        self.indices = indices
+        self.classes_count = classes_count
+        if target_freq is None:
+            target_freq = np.bincount(self.indices[self.indices >= 0], minlength=self.classes_count)
+        self.info = float(calculate_entropy(target_freq, len(self.indices)))
 
-        current_class_freq = 0
-        capacity = 0
-        for j in range(len(input_column)):
-            if is_belong_to_class(input_column[j], input_class_bounds):
-                capacity += 1
-                if is_belong_to_target_class(target_columns[j], target_class_bounds):
-                    current_class_freq += 1
-        if current_class_freq != 0:
-            result += part_of_i(current_class_freq, capacity)
-    return result
 
+def encode_target(target_columns: list[tuple[float, float]]) -> TargetEncoding:
+    indices, classes_count = get_target_class_indices(target_columns)
+    return TargetEncoding(indices, classes_count)
 
-def is_belong_to_target_class(value: tuple[float, float], class_bounds: tuple[float, tuple[float, float]]):
-    is_belong_to_first_column = value[0] == class_bounds[0]
-    is_belong_to_second_column = class_bounds[1][0] < value[1] < class_bounds[1][1]
-    return is_belong_to_first_column and is_belong_to_second_column
+
+EQUAL_WIDTH = 'equal_width'
+MDL = 'mdl'
+DISCRETIZATIONS = (EQUAL_WIDTH, MDL)
+TIE_TOLERANCE = 1e-9
 
 
-def is_belong_to_class(value: float, class_bounds: tuple[float, float]):
-    return class_bounds[0] <= value < class_bounds[1]
+def get_freq_logs(freq: np.ndarray) -> np.ndarray:
+    freq = np.asarray(freq, dtype=np.float64)
+    return freq * np.log2(np.maximum(freq, 1))
+
 
+def get_sweep_statistics(target_indices: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    _, codes, freq = np.unique(target_indices, return_inverse=True, return_counts=True)
+    order = np.argsort(codes, kind='stable')
+    ranks = np.empty(len(codes), dtype=np.int64)
+    ranks[order] = np.arange(len(codes)) - np.repeat(np.cumsum(freq) - freq, freq)
+    remaining = freq[codes] - ranks
+
+    left_logs = np.concatenate(([0.0], np.cumsum(get_freq_logs(ranks + 1) - get_freq_logs(ranks))))
+    right_logs = float(get_freq_logs(freq).sum()) + np.concatenate(
+        ([0.0], np.cumsum(get_freq_logs(remaining - 1) - get_freq_logs(remaining))))
+    left_classes = np.concatenate(([0], np.cumsum(ranks == 0)))
+    right_classes = len(freq) - np.concatenate(([0], np.cumsum(remaining == 1)))
+    return left_logs, right_logs, left_classes, right_classes
 
-def calculate_info_x(input_column: list[float], target_columns: list[tuple[float, float]]):
-    input_column_classes = get_classes(input_column)
 
-    result_sum = 0
-    for i in range(len(input_column_classes.values())):
-        class_range = input_column_classes[i]
-        class_freq = calculate_freq(input_column, class_range)
-        result_sum += (class_freq / len(input_column)) * calculate_info(input_column, class_range, target_columns)
+def get_sweep_entropy(freq_logs: float, capacity: int) -> float:
+    return np.log2(capacity) - freq_logs / capacity
 
-    return result_sum
 
+def find_best_split(sorted_values: np.ndarray, sorted_target_indices: np.ndarray, first: int,
+                    last: int) -> tuple[int, float, list[float], list[int]] | None:
+    cuts = first + 1 + np.flatnonzero(sorted_values[first + 1:last] != sorted_values[first:last - 1])
+    if len(cuts) == 0:
+        return None
 
-def calculate_gain_ratio(input_column: list[float], target_columns: list[tuple[float, float]]) -> float:
-    info = calculate_target_info(target_columns)
-    info_x = calculate_info_x(input_column, target_columns)
-    split = calculate_column_info(input_column)
-    return (info - info_x) / split
+    left_logs, right_logs, left_classes, right_classes = get_sweep_statistics(sorted_target_indices[first:last])
+    left_capacity = cuts - first
+    right_capacity = last - cuts
+    weighted_info = (left_capacity * np.log2(left_capacity) - left_logs[left_capacity] +
+                     right_capacity * np.log2(right_capacity) - right_logs[left_capacity])
+    best = int(np.argmax(weighted_info <= weighted_info.min() + TIE_TOLERANCE * (last - first)))
+    size = int(left_capacity[best])
 
+    capacity = last - first
+    entropies = [float(get_sweep_entropy(right_logs[0], capacity)),
+                 float(get_sweep_entropy(left_logs[size], size)),
+                 float(get_sweep_entropy(right_logs[size], capacity - size))]
+    classes_counts = [int(right_classes[0]), int(left_classes[size]), int(right_classes[size])]
+    gain = entropies[0] - float(weighted_info[best]) / capacity
+    return int(cuts[best]), gain, entropies, classes_counts
 
 
+def is_mdl_accepted(capacity: int, gain: float, entropies: list[float], classes_counts: list[int]) -> bool:
+    delta = log(3 ** classes_counts[0] - 2, 2) - (classes_counts[0] * entropies[0] -
+                                                   classes_counts[1] * entropies[1] -
+                                                   classes_counts[2] * entropies[2])
+    return gain > (log(capacity - 1, 2) + delta) / capacity
+
+
+def get_mdl_thresholds(input_column: np.ndarray, target: TargetEncoding) -> list[float]:
+    is_valid = ~np.isnan(input_column) & (target.indices >= 0)
+    values = input_column[is_valid]
+    order = np.argsort(values, kind='stable')
+    sorted_values = values[order]
+    sorted_target_indices = target.indices[is_valid][order]
+
+    thresholds = []
+    segments = [(0, len(sorted_values))]
+    while segments:
+        first, last = segments.pop()
+        split = find_best_split(sorted_values, sorted_target_indices, first, last)
+        if split is None:
+            continue
+        cut, gain, entropies, classes_counts = split
+        if is_mdl_accepted(last - first, gain, entropies, classes_counts):
+            thresholds.append(float(sorted_values[cut - 1] + sorted_values[cut]) / 2)
+            segments += [(first, cut), (cut, last)]
+    return sorted(thresholds)
+
+
+def get_threshold_classes(data: np.ndarray, thresholds: list[float]) -> dict[int, tuple[float, float]]:
+    values = data[~np.isnan(data)]
+    bounds = [float(values.min()) - 1] + thresholds + [float(values.max()) + 1]
+    return {i: (bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)}
+
+
+def calculate_classes_gain_ratio(input_column: np.ndarray, input_classes: dict[int, tuple[float, float]],
+                                 target: TargetEncoding) -> float:
+    input_indices = get_class_indices(input_column, input_classes)
+
+    input_freq = np.bincount(input_indices[input_indices >= 0], minlength=len(input_classes))
+    contingency_table = get_contingency_table(input_indices, len(input_classes), target.indices, target.classes_count)
+    return calculate_contingency_gain_ratio(input_freq, contingency_table, len(input_column), target.info)
+
+
+def calculate_contingency_gain_ratio(input_freq: np.ndarray, contingency_table: np.ndarray, data_capacity: int,
+                                     target_info: float) -> float:
+    info_x = np.sum((input_freq / data_capacity) * calculate_entropy(contingency_table, input_freq))
+    split = calculate_entropy(input_freq, data_capacity)
+    return (target_info - float(info_x)) / float(split)
+
+
+def find_mdl_split(input_column: list[float], target: TargetEncoding) -> tuple[list[float], float]:
+    input_column = np.asarray(input_column, dtype=np.float64)
+    thresholds = get_mdl_thresholds(input_column, target)
+    if not thresholds:
+        return thresholds, 0.0
+    return thresholds, calculate_classes_gain_ratio(input_column, get_threshold_classes(input_column, thresholds),
+                                                    target)
+
+
+@profiled
+def calculate_encoded_gain_ratio(input_column: list[float], target: TargetEncoding,
+                                 discretization: str = EQUAL_WIDTH) -> float:
+    if discretization == MDL:
+        return find_mdl_split(input_column, target)[1]
+    if discretization != EQUAL_WIDTH:
+        raise ValueError(f"Unknown discretization '{discretization}', expected one of {DISCRETIZATIONS}")
+
+    input_column = np.asarray(input_column, dtype=np.float64)
+    return calculate_classes_gain_ratio(input_column, get_classes(input_column), target)
+
+
+@profiled
+def calculate_gain_ratio(input_column: list[float], target_columns: list[tuple[float, float]],
+                         discretization: str = EQUAL_WIDTH) -> float:
+    return calculate_encoded_gain_ratio(input_column, encode_target(target_columns), discretization)
+
+
+shared_data = {}
+
+
+def attach_shared_data(matrix_name: str, matrix_shape: tuple[int, int], target_name: str, target_classes_count: int):
+    matrix_memory = SharedMemory(name=matrix_name)
+    target_memory = SharedMemory(name=target_name)
+    shared_data['memory'] = (matrix_memory, target_memory)
+    shared_data['matrix'] = np.ndarray(matrix_shape, dtype=np.float64, buffer=matrix_memory.buf)
+    target_indices = np.ndarray((matrix_shape[1],), dtype=np.int64, buffer=target_memory.buf)
+    shared_data['target'] = TargetEncoding(target_indices, target_classes_count)
+
+
+def calculate_shared_gain_ratios(first_column_index: int, last_column_index: int,
+                                 discretization: str = EQUAL_WIDTH) -> list[float]:
+    matrix = shared_data['matrix']
+    target = shared_data['target']
+    return [calculate_encoded_gain_ratio(matrix[i], target, discretization)
+            for i in range(first_column_index, last_column_index)]
+
+
+def calculate_gain_ratios_in_parallel(input_columns: list[np.ndarray], target: TargetEncoding,
+                                      workers: int, discretization: str = EQUAL_WIDTH) -> list[float]:
+    matrix_shape = (len(input_columns), len(target.indices))
+    matrix_memory = SharedMemory(create=True, size=max(1, 8 * matrix_shape[0] * matrix_shape[1]))
+    target_memory = SharedMemory(create=True, size=max(1, 8 * matrix_shape[1]))
+    try:
+        matrix = np.ndarray(matrix_shape, dtype=np.float64, buffer=matrix_memory.buf)
+        for i in range(len(input_columns)):
+            matrix[i] = input_columns[i]
+        np.ndarray((matrix_shape[1],), dtype=np.int64, buffer=target_memory.buf)[:] = target.indices
+        del matrix
+
+        step = max(1, -(-len(input_columns) // (4 * workers)))
+        bounds = [(i, min(i + step, len(input_columns))) for i in range(0, len(input_columns), step)]
+        initargs = (matrix_memory.name, matrix_shape, target_memory.name, target.classes_count)
+        with ProcessPoolExecutor(workers, initializer=attach_shared_data, initargs=initargs) as executor:
+            first_indices, last_indices = zip(*bounds)
+            parts = executor.map(calculate_shared_gain_ratios, first_indices, last_indices,
+                                 [discretization] * len(bounds))
+            return [ratio for part in parts for ratio in part]
+    finally:
+        matrix_memory.close()
+        matrix_memory.unlink()
+        target_memory.close()
+        target_memory.unlink()
+
+
+def calculate_gain_ratios(input_columns: dict[str, list[float]], target_columns: list[tuple[float, float]],
+                          workers: int = 1, discretization: str = EQUAL_WIDTH) -> dict[str, float]:
+    target = encode_target(target_columns)
+    if workers > 1 and len(input_columns) > 1:
+        columns = [np.asarray(column, dtype=np.float64) for column in input_columns.values()]
+        ratios = calculate_gain_ratios_in_parallel(columns, target, workers, discretization)
+        return dict(zip(input_columns.keys(), ratios))
+    return {name: calculate_encoded_gain_ratio(column, target, discretization)
+            for name, column in input_columns.items()}
@@ -0,0 +1,58 @@
+import numpy as np
+
+
+STATISTIC = 'statistic'
+KNN = 'knn'
+FILLING_METHODS = (STATISTIC, KNN)
+
+
+def get_standardized_matrix(matrix: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nanmean(matrix, axis=0)
+        deviation = np.nanstd(matrix, axis=0)
+    deviation[~(deviation > 0)] = 1
+    return (matrix - mean) / deviation
+
+
+def get_majority_values(neighbour_values: np.ndarray) -> np.ndarray:
+    votes = (neighbour_values[:, :, np.newaxis] == neighbour_values[:, np.newaxis, :]).sum(axis=2)
+    return neighbour_values[np.arange(len(neighbour_values)), np.argmax(votes, axis=1)]
+
+
+def impute_knn(matrix: np.ndarray, is_filled: list[bool], is_feature: list[bool], is_categorical: list[bool],
+               neighbours_count: int = 5, candidates_factor: int = 4) -> list[np.ndarray | None]:
+    from scipy.spatial import cKDTree
+
+    feature_indices = np.flatnonzero(is_feature)
+    features = get_standardized_matrix(matrix[:, feature_indices])
+    is_missing = np.isnan(features)
+    is_complete = ~is_missing.any(axis=1)
+    if not is_complete.any():
+        raise ValueError("kNN imputation needs at least one row without missing values")
+
+    complete_rows = np.flatnonzero(is_complete)
+    tree = cKDTree(features[is_complete])
+    query_rows = np.flatnonzero(~is_complete)
+    neighbours_count = min(neighbours_count, len(complete_rows))
+    candidates_count = min(neighbours_count * candidates_factor, len(complete_rows))
+    query_features = np.where(is_missing[query_rows], 0.0, features[query_rows])
+    _, candidates = tree.query(query_features, k=candidates_count, workers=-1)
+    candidate_rows = complete_rows[np.asarray(candidates).reshape(len(query_rows), candidates_count)]
+
+    differences = features[candidate_rows] - query_features[:, np.newaxis, :]
+    distances = np.where(is_missing[query_rows][:, np.newaxis, :], 0.0, differences ** 2).sum(axis=2)
+    nearest = np.argsort(distances, axis=1, kind='stable')[:, :neighbours_count]
+    neighbour_rows = np.take_along_axis(candidate_rows, nearest, axis=1)
+
+    filling_values = []
+    for i in range(matrix.shape[1]):
+        if not is_filled[i]:
+            filling_values.append(None)
+            continue
+        is_query_missing = np.isnan(matrix[query_rows, i])
+        neighbour_values = matrix[neighbour_rows[is_query_missing], i]
+        if is_categorical[i]:
+            filling_values.append(get_majority_values(neighbour_values))
+        else:
+            filling_values.append(neighbour_values.mean(axis=1))
+    return filling_values
@@ -0,0 +1,115 @@
+import numpy as np
+
+from gain_ratio import (calculate_contingency_gain_ratio, calculate_entropy, get_class_indices, get_classes,
+                        get_contingency_table)
+
+
+def is_out_of_bounds(values: np.ndarray, classes: dict[int, tuple[float, float]], is_strict: bool = False) -> bool:
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return False
+    lower_bound = classes[0][0]
+    upper_bound = classes[len(classes) - 1][1]
+    if is_strict:
+        return bool(values.min() <= lower_bound or values.max() >= upper_bound)
+    return bool(values.min() < lower_bound or values.max() >= upper_bound)
+
+
+class IncrementalGainRatio:
+    column_names: list[str]
+    rows_count: int
+    input_classes: list[dict[int, tuple[float, float]]]
+    input_freq: list[np.ndarray]
+    contingency_tables: list[np.ndarray]
+    target_classes: dict[int, tuple[float, float]]
+    target_codes: dict[tuple[float, int], int]
+    target_freq: np.ndarray
+
+    def __init__(self, column_names: list[str], data: np.ndarray):
+        self.column_names = column_names
+        self.__data_chunks = [np.asarray(data, dtype=np.float64).reshape(-1, len(column_names) + 2)]
+        self.__codes_chunks = []
+        self.rebin()
+
+    def get_data(self) -> np.ndarray:
+        if len(self.__data_chunks) > 1:
+            self.__data_chunks = [np.concatenate(self.__data_chunks)]
+        return self.__data_chunks[0]
+
+    def __get_codes(self) -> np.ndarray:
+        if len(self.__codes_chunks) > 1:
+            self.__codes_chunks = [np.concatenate(self.__codes_chunks)]
+        return self.__codes_chunks[0]
+
+    def rebin(self):
+        data = self.get_data()
+        self.rows_count = len(data)
+        self.target_classes = get_classes(data[:, -1])
+        self.target_codes = {}
+        self.target_freq = np.zeros(0, dtype=np.int64)
+        self.__codes_chunks = [self.__encode_target(data[:, -2:])]
+
+        self.input_classes = [None] * len(self.column_names)
+        self.input_freq = [None] * len(self.column_names)
+        self.contingency_tables = [None] * len(self.column_names)
+        for i in range(len(self.column_names)):
+            self.rebin_column(i)
+
+    def rebin_column(self, index: int):
+        values = self.get_data()[:, index]
+        self.input_classes[index] = get_classes(values)
+        self.input_freq[index] = np.zeros(len(self.input_classes[index]), dtype=np.int64)
+        self.contingency_tables[index] = np.zeros((len(self.input_classes[index]), len(self.target_codes)),
+                                                  dtype=np.int64)
+        self.__count_column(index, values, self.__get_codes())
+
+    def __encode_target(self, target: np.ndarray) -> np.ndarray:
+        second_column_indices = get_class_indices(target[:, 1], self.target_classes, is_strict=True)
+        is_valid = ~np.isnan(target[:, 0]) & (second_column_indices >= 0)
+        cells, inverse = np.unique(np.column_stack((target[is_valid, 0], second_column_indices[is_valid])),
+                                   axis=0, return_inverse=True)
+        cell_codes = [self.target_codes.setdefault((float(value), int(index)), len(self.target_codes))
+                      for value, index in cells]
+
+        codes = np.full(len(target), -1, dtype=np.int64)
+        codes[is_valid] = np.asarray(cell_codes, dtype=np.int64)[inverse.reshape(-1)]
+        classes_count = len(self.target_codes)
+        self.target_freq = np.pad(self.target_freq, (0, classes_count - len(self.target_freq)))
+        self.target_freq += np.bincount(codes[codes >= 0], minlength=classes_count)
+        return codes
+
+    def __count_column(self, index: int, values: np.ndarray, codes: np.ndarray):
+        classes_count = len(self.target_codes)
+        input_classes = self.input_classes[index]
+        input_indices = get_class_indices(values, input_classes)
+        contingency_table = self.contingency_tables[index]
+        contingency_table = np.pad(contingency_table, ((0, 0), (0, classes_count - contingency_table.shape[1])))
+
+        self.contingency_tables[index] = contingency_table + get_contingency_table(input_indices, len(input_classes),
+                                                                                   codes, classes_count)
+        self.input_freq[index] += np.bincount(input_indices[input_indices >= 0], minlength=len(input_classes))
+
+    def append(self, rows: np.ndarray):
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(self.column_names) + 2)
+        self.__data_chunks.append(rows)
+        if is_out_of_bounds(rows[:, -1], self.target_classes, is_strict=True):
+            self.rebin()
+            return
+
+        codes = self.__encode_target(rows[:, -2:])
+        self.__codes_chunks.append(codes)
+        self.rows_count += len(rows)
+        for i in range(len(self.column_names)):
+            if is_out_of_bounds(rows[:, i], self.input_classes[i]):
+                self.rebin_column(i)
+            else:
+                self.__count_column(i, rows[:, i], codes)
+
+    def get_target_info(self) -> float:
+        return float(calculate_entropy(self.target_freq, self.rows_count))
+
+    def get_gain_ratios(self) -> dict[str, float]:
+        target_info = self.get_target_info()
+        return {self.column_names[i]: calculate_contingency_gain_ratio(self.input_freq[i], self.contingency_tables[i],
+                                                                       self.rows_count, target_info)
+                for i in range(len(self.column_names))}
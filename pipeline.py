@@ -0,0 +1,268 @@
+import argparse
+import hashlib
+import inspect
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+
+import preparation
+import profiling
+import table_preparing as prep
+from columnar import load_columns, save_columns
+from disk_table import DiskTable
+from filter_rule import FilterRule
+from gain_ratio import EQUAL_WIDTH
+from imputation import STATISTIC
+from preprocessing import get_preprocessor
+from rendering import Renderer
+from table import Table
+
+
+PIPELINE_CACHE_VERSION = 2
+HASH_BLOCK_SIZE = 1 << 20
+FINGERPRINT_PATTERN = re.compile('[0-9a-f]{64}')
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_FILE = os.path.join(SOURCE_DIRECTORY, 'pipeline.json')
+STAGE_CACHE_DIRECTORY = '.cache/stages'
+
+
+class RecordsHandler(logging.Handler):
+    records: list[list]
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append([record.levelno, record.getMessage()])
+
+
+def get_filter_rules(rules: list[list]) -> list[FilterRule]:
+    return [FilterRule(name, lower_bound=lower_bound, upper_bound=upper_bound)
+            for name, lower_bound, upper_bound in rules]
+
+
+def get_table(input_path: str = preparation.INPUT_DATA, chunk_size: int | None = None,
+              disk_directory: str | None = None) -> Table | DiskTable:
+    with open(input_path, 'r') as input_file:
+        return preparation.get_table(input_file, chunk_size, disk_directory=disk_directory)
+
+
+def find_categorical_columns(table: Table, renderer: Renderer | None = None):
+    return preparation.find_categorical_columns(table, renderer is not None, renderer)
+
+
+def process_missing_values(table: Table, method: str = STATISTIC, renderer: Renderer | None = None):
+    return preparation.process_missing_values(table, renderer is not None, method, renderer)
+
+
+def remove_outliers(table: Table, rules: list[list] = (), renderer: Renderer | None = None):
+    return preparation.remove_outliers(table, renderer is not None, get_filter_rules(rules), renderer)
+
+
+def get_gain_ratio(table: Table, workers: int = 1, discretization: str = EQUAL_WIDTH,
+                   renderer: Renderer | None = None):
+    return preparation.get_gain_ratio(table, renderer is not None, workers, discretization, renderer)
+
+
+def get_correlation_map(table: Table, workers: int = 1, discretization: str = EQUAL_WIDTH,
+                        permutations_count: int = 0, renderer: Renderer | None = None):
+    return preparation.get_correlation_map(table, renderer is not None, renderer, workers=workers,
+                                    discretization=discretization, permutations_count=permutations_count)
+
+
+def normalize(table: Table):
+    table.normalize()
+
+
+def print_full_table(table: Table, rows_limit: int | None = 20):
+    table.print_full_table(rows_limit)
+
+
+def save_in_file(table: Table, filename: str = preparation.OUTPUT_FILE):
+    table.save_in_file(filename)
+
+
+def save_preprocessor(table: Table, filename: str = preparation.PREPROCESSOR_FILE):
+    table.get_preprocessor().save(filename)
+
+
+SOURCE_STAGE = 'get_table'
+STAGES = {
+    SOURCE_STAGE: (get_table, True),
+    'find_categorical_columns': (find_categorical_columns, True),
+    'process_missing_values': (process_missing_values, True),
+    'remove_outliers': (remove_outliers, True),
+    'get_gain_ratio': (get_gain_ratio, True),
+    'get_correlation_map': (get_correlation_map, True),
+    'normalize': (normalize, True),
+    'print_full_table': (print_full_table, False),
+    'save_in_file': (save_in_file, False),
+    'save_preprocessor': (save_preprocessor, False),
+}
+
+
+def load_pipeline(filename: str) -> dict:
+    with open(filename, 'r') as pipeline_file:
+        pipeline = json.load(pipeline_file)
+    if not pipeline['stages'] or pipeline['stages'][0]['name'] != SOURCE_STAGE:
+        raise ValueError(f"Pipeline must start with the '{SOURCE_STAGE}' stage")
+    for stage in pipeline['stages']:
+        if stage['name'] not in STAGES:
+            raise ValueError(f"Unknown stage '{stage['name']}', expected one of {list(STAGES)}")
+    return pipeline
+
+
+def override_parameters(pipeline: dict, overrides: dict[str, dict]):
+    for stage in pipeline['stages']:
+        parameters = {name: value for name, value in overrides.get(stage['name'], {}).items() if value is not None}
+        if parameters:
+            stage['parameters'] = {**stage.get('parameters', {}), **parameters}
+
+
+def load_outlier_rules(filename: str = PIPELINE_FILE) -> list[FilterRule]:
+    for stage in load_pipeline(filename)['stages']:
+        if stage['name'] == 'remove_outliers':
+            return get_filter_rules(stage.get('parameters', {}).get('rules', []))
+    return []
+
+
+def get_code_version() -> str:
+    digest = hashlib.sha256()
+    for filename in sorted(os.listdir(SOURCE_DIRECTORY)):
+        if filename.endswith('.py'):
+            with open(os.path.join(SOURCE_DIRECTORY, filename), 'rb') as source_file:
+                digest.update(filename.encode() + b'\0' + source_file.read() + b'\0')
+    return digest.hexdigest()
+
+
+def get_input_fingerprint(input_path: str, options: dict) -> str:
+    digest = hashlib.sha256()
+    with open(input_path, 'rb') as input_file:
+        for block in iter(lambda: input_file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    digest.update(json.dumps(options, sort_keys=True, ensure_ascii=False).encode())
+    return digest.hexdigest()
+
+
+def get_fingerprints(stages: list[dict]) -> list[str]:
+    input_path = stages[0].get('parameters', {}).get('input_path', preparation.INPUT_DATA)
+    fingerprint = get_input_fingerprint(input_path, {'missing_values': sorted(prep.MISSING_VALUES),
+                                                     'pipeline_cache_version': PIPELINE_CACHE_VERSION,
+                                                     'code_version': get_code_version()})
+    fingerprints = []
+    for stage in stages:
+        description = json.dumps({'stage': stage['name'], 'parameters': stage.get('parameters', {})},
+                                 sort_keys=True, ensure_ascii=False)
+        fingerprint = hashlib.sha256(f"{fingerprint}:{description}".encode()).hexdigest()
+        fingerprints.append(fingerprint)
+    return fingerprints
+
+
+def read_stage_metadata(cache_directory: str, fingerprint: str) -> dict | None:
+    try:
+        with open(os.path.join(cache_directory, fingerprint, 'columns.json'), 'r') as columns_file:
+            return json.load(columns_file)['metadata']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def load_stage(cache_directory: str, fingerprint: str) -> Table:
+    column_names, matrix, _, metadata = load_columns(os.path.join(cache_directory, fingerprint))
+    table = Table(matrix, column_names, metadata['target_variables_count'])
+    table.preprocessor = get_preprocessor(metadata['preprocessor'])
+    return table
+
+
+def save_stage(cache_directory: str, fingerprint: str, table: Table, records: list[list], result):
+    metadata = {'target_variables_count': table.target_variables_count,
+                'preprocessor': table.get_preprocessor().to_dict(), 'records': records, 'result': result}
+    os.makedirs(cache_directory, exist_ok=True)
+    save_columns(os.path.join(cache_directory, fingerprint), table.get_column_names(), table.matrix, metadata)
+
+
+def prune_stages(cache_directory: str, fingerprints: list[str]):
+    kept_fingerprints = set(fingerprints)
+    for name in os.listdir(cache_directory):
+        path = os.path.join(cache_directory, name)
+        if FINGERPRINT_PATTERN.fullmatch(name) and name not in kept_fingerprints and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def run_stage(function, table: Table | DiskTable | None, parameters: dict,
+              context: dict | None = None) -> tuple[object, list[list]]:
+    accepted_parameters = inspect.signature(function).parameters
+    parameters = {**{name: value for name, value in (context or {}).items() if name in accepted_parameters},
+                  **parameters}
+    handler = RecordsHandler()
+    logger = logging.getLogger()
+    logger.addHandler(handler)
+    try:
+        result = function(**parameters) if table is None else function(table, **parameters)
+    finally:
+        logger.removeHandler(handler)
+    return result, handler.records
+
+
+def run_pipeline(pipeline: dict, cache_directory: str | None = STAGE_CACHE_DIRECTORY,
+                 context: dict | None = None) -> dict[str, object]:
+    stages = pipeline['stages']
+    fingerprints = get_fingerprints(stages) if cache_directory is not None else []
+
+    cached_metadata = []
+    while cache_directory is not None and len(cached_metadata) < len(stages):
+        stage = stages[len(cached_metadata)]
+        metadata = read_stage_metadata(cache_directory, fingerprints[len(cached_metadata)])
+        if not STAGES[stage['name']][1] or metadata is None:
+            break
+        cached_metadata.append(metadata)
+
+    table = None
+    results = {}
+    for stage, metadata in zip(stages, cached_metadata):
+        for level, message in metadata['records']:
+            logging.log(level, message)
+        results[stage['name']] = metadata['result']
+    if cached_metadata:
+        table = load_stage(cache_directory, fingerprints[len(cached_metadata) - 1])
+
+    for i in range(len(cached_metadata), len(stages)):
+        stage = stages[i]
+        function, is_cached = STAGES[stage['name']]
+        with profiling.stage(stage['name']) as record:
+            result, records = run_stage(function, table, stage.get('parameters', {}), context)
+            if isinstance(result, (Table, DiskTable)):
+                table, result = result, None
+            if table is not None:
+                record.add_shape(*table.get_shape())
+        results[stage['name']] = result
+        if is_cached and cache_directory is not None:
+            save_stage(cache_directory, fingerprints[i], table, records, result)
+    if cache_directory is not None and os.path.isdir(cache_directory):
+        prune_stages(cache_directory, fingerprints)
+    return results
+
+
+def main_pipeline(arguments: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Run the preparation stages described in a pipeline file')
+    parser.add_argument('pipeline', nargs='?', default=PIPELINE_FILE)
+    parser.add_argument('--report', default=preparation.REPORT_FILE, help='log of the preparation steps')
+    parser.add_argument('--profile', default=preparation.PROFILE_FILE, help='per-stage timings in JSON')
+    parser.add_argument('--cache-directory', default=STAGE_CACHE_DIRECTORY, help='cache of stage outputs')
+    parser.add_argument('--no-cache', action='store_true', help='run every stage')
+    parser.add_argument('--trace-memory', action='store_true', help='record peak allocations of every stage')
+    options = parser.parse_args(arguments)
+
+    profiling.trace_memory(options.trace_memory)
+    logging.basicConfig(filename=options.report, filemode='w', format='[%(levelname)s] %(message)s',
+                        level=logging.INFO, force=True)
+    run_pipeline(load_pipeline(options.pipeline), None if options.no_cache else options.cache_directory)
+    profiling.save_summary(options.profile)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_pipeline())
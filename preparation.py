@@ -0,0 +1,179 @@
+import numpy as np
+import logging as log
+
+from add import print_list
+from table import Table, FilterRule
+from preprocessing import Preprocessor
+import table_preparing as prep
+from disk_table import DiskTable
+from streaming import read_disk_table, read_table
+from correlation import find_redundant_pairs
+from gain_ratio import EQUAL_WIDTH
+from imputation import STATISTIC
+from rendering import Renderer
+from significance import GainRatioSignificance
+
+
+INPUT_DATA = 'resources/ID_data_mass_18122012.csv'
+PROFILE_FILE = 'out.profile.json'
+PREPROCESSOR_FILE = 'out.preprocessor.json'
+OUTPUT_FILE = 'out.csv'
+REPORT_FILE = 'out.md'
+DISK_CHUNK_SIZE = 100000
+
+
+def plot_characteristic(column_names, values):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots()
+    axes.barh(column_names, values)
+    axes.set_facecolor('floralwhite')
+    fig.set_figwidth(13)
+    fig.set_figheight(10)
+    fig.subplots_adjust(left=0.2)
+    plt.show()
+
+
+def figure_characteristic(column_names, values, renderer: Renderer | None = None, name: str = 'characteristic'):
+    from tabulate import tabulate
+
+    if renderer is not None:
+        renderer.render_characteristic(name, column_names, values)
+    else:
+        plot_characteristic(column_names, values)
+    print(tabulate([values], column_names, tablefmt="grid"))
+
+
+def get_table(input_file, chunk_size: int | None = None, disk_directory: str | None = None) -> Table | DiskTable:
+    target_variables_count = 2
+    if disk_directory is not None:
+        chunk_size = chunk_size or DISK_CHUNK_SIZE
+        table, _ = read_disk_table(input_file, disk_directory, chunk_size, target_variables_count)
+        log.info(f"Streamed {table.rows_count} rows in chunks of {chunk_size} into {disk_directory}")
+        return table
+
+    if chunk_size is not None:
+        table, statistics, _ = read_table(input_file, chunk_size, target_variables_count)
+        log.info(f"Streamed {statistics.rows_count} rows in chunks of {chunk_size}")
+        return table
+
+    column_names = prep.read_column_names(input_file)
+    data = prep.parse_data(input_file, len(column_names))
+
+    prep.log_merged_kgf(column_names[-2:])
+    data = prep.merge_kgf_columns(data)
+    column_names.pop()
+    is_significant = prep.get_significant_rows_mask(data, target_variables_count)
+    deleted_rows_count = int(len(data) - np.count_nonzero(is_significant))
+    prep.log_insignificant_rows(deleted_rows_count, target_variables_count, column_names)
+    return Table(data[is_significant], column_names, target_variables_count)
+
+
+def transform_batch(input_file, preprocessor: Preprocessor) -> np.ndarray:
+    column_names = prep.read_column_names(input_file)
+    data = prep.merge_kgf_columns(prep.parse_data(input_file, len(column_names)))
+    data = data[prep.get_significant_rows_mask(data, preprocessor.target_variables_count)]
+    return preprocessor.transform(data)
+
+
+def process_missing_values(table: Table, is_visually: bool, method: str = STATISTIC,
+                           renderer: Renderer | None = None):
+    if is_visually:
+        figure_characteristic(table.column_names, table.get_missing_rate(), renderer, 'missing_rate_before')
+
+    table.fill_missing_values(method)
+    table.delete_half_empty_columns()
+    table.delete_static_columns()
+
+    if is_visually:
+        figure_characteristic(table.column_names, table.get_missing_rate(), renderer, 'missing_rate_after')
+
+
+def get_correlation_map(table: Table, is_visually: bool, renderer: Renderer | None = None, workers: int = 1,
+                        discretization: str = EQUAL_WIDTH, permutations_count: int = 0):
+    if is_visually:
+        if renderer is not None:
+            renderer.render_correlation(table.get_column_names(), table.get_correlation_table())
+        else:
+            table.figure_plot_correlation()
+
+    correlation_map = table.get_correlation_table()
+    highly_correlated_columns = find_redundant_pairs(correlation_map, len(correlation_map) - 2)
+
+    log.info("")
+    names = table.get_column_names()
+    significance = get_gain_ratio_significance(table, permutations_count) if permutations_count > 0 else None
+
+    deleted = []
+    for column_tuple in highly_correlated_columns:
+        log.info(f"Column {print_list([names[column_tuple[0]]], '')} correlated ({round(column_tuple[2], 3)}%) with {print_list([names[column_tuple[1]]], '')} ")
+        deleted_column_index = delete_one(table, column_tuple[0], column_tuple[1], workers, discretization,
+                                          significance)
+        if deleted_column_index is not None:
+            deleted.append(deleted_column_index)
+
+    log.info(f"Columns {print_list([str(val) for val in sorted(list(set(deleted)))], ', ')} can be deleted")
+
+
+def delete_one(table: Table, first_column: int, second_column: int, workers: int = 1,
+               discretization: str = EQUAL_WIDTH,
+               significance: dict[str, GainRatioSignificance] | None = None) -> int | None:
+    gain_ratio = get_gain_ratio(table, is_visually=False, workers=workers, discretization=discretization)
+    first_rate = gain_ratio[first_column]
+    second_rate = gain_ratio[second_column]
+    if significance is not None:
+        names = table.get_column_names()
+        first, second = significance[names[first_column]], significance[names[second_column]]
+        if first.lower_bound <= second.upper_bound and second.lower_bound <= first.upper_bound:
+            log.info(f"Gain ratios of {print_list([names[first_column], names[second_column]], ', ')} are not significantly different, both are kept")
+            return None
+    deleted_column_index = first_column if first_rate < second_rate else second_column
+    return deleted_column_index
+
+
+def get_gain_ratio_significance(table: Table, permutations_count: int) -> dict[str, GainRatioSignificance]:
+    significance = table.get_gain_ratio_significance(permutations_count, permutations_count)
+    for name, value in significance.items():
+        log.info(f"Column {print_list([name], '')} gain ratio {round(value.gain_ratio, 3)} "
+                 f"(95% CI {round(value.lower_bound, 3)}..{round(value.upper_bound, 3)}, p = {round(value.p_value, 4)})")
+    return significance
+
+
+def remove_outliers(table: Table, is_visually: bool, rules: list[FilterRule], renderer: Renderer | None = None):
+    if is_visually:
+        if renderer is not None:
+            renderer.render_histograms(table.columns)
+        else:
+            table.figure_histograms()
+        figure_characteristic(table.column_names, table.get_upper_bound(), renderer, 'upper_bound')
+        figure_characteristic(table.column_names, table.get_lower_bound(), renderer, 'lower_bound')
+
+    for rule in rules:
+        table.add_filter_rule(rule)
+    deleted_rows_count = table.apply_filter_rules()
+    for rule, count in deleted_rows_count:
+        log.info(f"{count} outliers were deleted by rule {rule}")
+
+    log.info(f"{sum(count for _, count in deleted_rows_count)} outliers were deleted")
+    return [[str(rule), count] for rule, count in deleted_rows_count]
+
+
+def find_categorical_columns(table, is_visually: bool, renderer: Renderer | None = None):
+    if is_visually:
+        figure_characteristic(table.get_column_names(), table.get_unique_elements_percentage(), renderer,
+                              'unique_elements_percentage')
+
+    table.find_categorical_columns()
+
+
+def get_gain_ratio(table: Table, is_visually: bool, workers: int = 1, discretization: str = EQUAL_WIDTH,
+                   renderer: Renderer | None = None):
+    # test_age = [0, 0, 50, 100, 100, 100, 50, 0, 0, 100, 0, 50, 50, 100]
+    # test_income = [100, 100, 100, 50, 0, 0, 0, 50, 0, 50, 50, 50, 100, 50]
+    # output = [(1, 0), (1, 0), (1, 100), (1, 100), (1, 100), (1, 0), (1, 100), (1, 0), (1, 100), (1, 100), (1, 100), (1, 100), (1, 100), (1, 0)]
+    # print(calculate_gain_ratio(test_income, output))
+
+    ratio = list(table.get_gain_ratios(workers, discretization).values())
+    if is_visually:
+        figure_characteristic(table.column_names[:-2], ratio, renderer, 'gain_ratio')
+    return ratio
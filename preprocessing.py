@@ -0,0 +1,78 @@
+import json
+
+import numpy as np
+
+from filter_rule import FilterRule
+
+
+class Preprocessor:
+    column_names: list[str]
+    target_variables_count: int
+    categorical_columns: list[str]
+    filling_values: dict[str, float]
+    kept_columns: list[str]
+    filter_rules: list[FilterRule]
+    normalization_bounds: dict[str, tuple[float, float]]
+
+    def __init__(self, column_names: list[str], target_variables_count: int):
+        self.column_names = list(column_names)
+        self.target_variables_count = target_variables_count
+        self.categorical_columns = []
+        self.filling_values = {}
+        self.kept_columns = list(column_names)
+        self.filter_rules = []
+        self.normalization_bounds = {}
+
+    def to_dict(self) -> dict:
+        for rule in self.filter_rules:
+            if rule.predicate is not None:
+                raise ValueError(f"Filter rule '{rule}' has a custom predicate and cannot be serialized")
+        return {
+            'column_names': self.column_names,
+            'target_variables_count': self.target_variables_count,
+            'categorical_columns': self.categorical_columns,
+            'filling_values': self.filling_values,
+            'kept_columns': self.kept_columns,
+            'filter_rules': [[rule.column_name, rule.lower_bound, rule.upper_bound] for rule in self.filter_rules],
+            'normalization_bounds': self.normalization_bounds,
+        }
+
+    def save(self, filename: str):
+        with open(filename, 'w') as output_file:
+            json.dump(self.to_dict(), output_file, ensure_ascii=False, separators=(',', ':'))
+
+    def transform(self, data: np.ndarray) -> np.ndarray:
+        matrix = np.array(data, dtype=np.float64).reshape(-1, len(self.column_names))
+
+        filling_vector = np.array([self.filling_values.get(name, np.nan) for name in self.column_names])
+        matrix = np.where(np.isnan(matrix), filling_vector, matrix)
+        matrix = matrix[:, [self.column_names.index(name) for name in self.kept_columns]]
+
+        is_target_missing = np.isnan(matrix[:, len(self.kept_columns) - self.target_variables_count])
+        keep_mask = np.ones(len(matrix), dtype=bool)
+        for rule in self.filter_rules:
+            keep_mask &= ~(is_target_missing & ~rule.is_satisfied(matrix[:, self.kept_columns.index(rule.column_name)]))
+        matrix = matrix[keep_mask]
+
+        if self.normalization_bounds:
+            bounds = np.array([self.normalization_bounds[name] for name in self.kept_columns])
+            matrix -= bounds[:, 0]
+            matrix /= bounds[:, 1] - bounds[:, 0]
+        return np.asfortranarray(matrix)
+
+
+def load_preprocessor(filename: str) -> Preprocessor:
+    with open(filename, 'r') as input_file:
+        return get_preprocessor(json.load(input_file))
+
+
+def get_preprocessor(description: dict) -> Preprocessor:
+    preprocessor = Preprocessor(description['column_names'], description['target_variables_count'])
+    preprocessor.categorical_columns = description['categorical_columns']
+    preprocessor.filling_values = description['filling_values']
+    preprocessor.kept_columns = description['kept_columns']
+    preprocessor.filter_rules = [FilterRule(name, lower_bound=lower_bound, upper_bound=upper_bound)
+                                 for name, lower_bound, upper_bound in description['filter_rules']]
+    preprocessor.normalization_bounds = {name: tuple(bounds)
+                                         for name, bounds in description['normalization_bounds'].items()}
+    return preprocessor
@@ -0,0 +1,118 @@
+import json
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+
+class Record:
+    calls: int
+    wall_time: float
+    cpu_time: float
+    rows: int
+    columns: int
+    peak_memory: int
+    rss_growth: int
+
+    def __init__(self):
+        self.calls = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.rows = 0
+        self.columns = 0
+        self.peak_memory = 0
+        self.rss_growth = 0
+
+    def add_shape(self, rows: int, columns: int):
+        self.rows += rows
+        self.columns += columns
+
+    def to_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'wall_time': round(self.wall_time, 6),
+            'cpu_time': round(self.cpu_time, 6),
+            'rows': self.rows,
+            'columns': self.columns,
+            'peak_memory': self.peak_memory,
+            'rss_growth': self.rss_growth,
+        }
+
+
+stages: dict[str, Record] = {}
+functions: dict[str, Record] = {}
+
+
+def trace_memory(is_enabled: bool = True):
+    if is_enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not is_enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def get_max_rss() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get_record(records: dict[str, Record], name: str) -> Record:
+    record = records.get(name)
+    if record is None:
+        record = records[name] = Record()
+    return record
+
+
+@contextmanager
+def stage(name: str):
+    record = get_record(stages, name)
+    memory_start = 0
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        memory_start = tracemalloc.get_traced_memory()[0]
+    rss_start = get_max_rss()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    finally:
+        record.wall_time += time.perf_counter() - wall_start
+        record.cpu_time += time.process_time() - cpu_start
+        record.calls += 1
+        if tracemalloc.is_tracing():
+            record.peak_memory = max(record.peak_memory, tracemalloc.get_traced_memory()[1] - memory_start)
+        record.rss_growth += get_max_rss() - rss_start
+
+
+def profiled(function):
+    record = get_record(functions, function.__qualname__)
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record.wall_time += time.perf_counter() - wall_start
+            record.cpu_time += time.process_time() - cpu_start
+            record.calls += 1
+
+    return wrapper
+
+
+def get_summary() -> dict:
+    return {
+        'stages': {name: record.to_dict() for name, record in stages.items()},
+        'functions': {name: record.to_dict() for name, record in functions.items() if record.calls},
+    }
+
+
+def save_summary(filename: str):
+    with open(filename, 'w') as output_file:
+        json.dump(get_summary(), output_file, indent=2, ensure_ascii=False)
+
+
+def reset():
+    stages.clear()
+    for record in functions.values():
+        record.__init__()
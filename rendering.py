@@ -0,0 +1,88 @@
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+
+from column import Column
+
+
+def use_headless_backend():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def plot_characteristic(filename: str, column_names: list[str], values: list[float]):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots()
+    axes.barh(column_names, values)
+    axes.set_facecolor('floralwhite')
+    fig.set_figwidth(13)
+    fig.set_figheight(10)
+    fig.subplots_adjust(left=0.2)
+    fig.savefig(filename)
+    plt.close(fig)
+
+
+def plot_histogram(filename: str, title: str, counts: np.ndarray, edges: np.ndarray, lower_bound: float,
+                   upper_bound: float):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots()
+    axes.hist(edges[:-1], bins=edges, weights=counts)
+    axes.set_title(title)
+    for bound in (upper_bound, lower_bound):
+        if bound and bound == bound:
+            axes.axvline(x=bound)
+    fig.savefig(filename)
+    plt.close(fig)
+
+
+def plot_correlation(filename: str, column_names: list[str], correlation: np.ndarray):
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(20, 15))
+    plt.matshow(correlation, fignum=fig.number)
+    plt.xticks(range(len(column_names)), column_names, fontsize=14, rotation=90)
+    plt.yticks(range(len(column_names)), column_names, fontsize=14)
+    cb = plt.colorbar()
+    cb.ax.tick_params(labelsize=14)
+    fig.savefig(filename)
+    plt.close(fig)
+
+
+class Renderer:
+    output_directory: str
+    futures: list[Future]
+
+    def __init__(self, output_directory: str, workers: int | None = None):
+        os.makedirs(output_directory, exist_ok=True)
+        self.output_directory = output_directory
+        self.futures = []
+        self.__executor = ProcessPoolExecutor(workers, initializer=use_headless_backend)
+
+    def get_path(self, name: str) -> str:
+        return os.path.join(self.output_directory, f'{name}.png')
+
+    def __submit(self, function, name: str, *args):
+        self.futures.append(self.__executor.submit(function, self.get_path(name), *args))
+
+    def render_characteristic(self, name: str, column_names: list[str], values: list[float]):
+        self.__submit(plot_characteristic, name, list(column_names), [float(value) for value in values])
+
+    def render_histograms(self, columns: list[Column]):
+        for i in range(len(columns)):
+            counts, edges = columns[i].get_histogram()
+            self.__submit(plot_histogram, f'histogram_{i}', columns[i].column_name, counts, edges,
+                          columns[i].get_lower_bound(), columns[i].get_upper_bound())
+
+    def render_correlation(self, column_names: list[str], correlation: np.ndarray):
+        self.__submit(plot_correlation, 'correlation', list(column_names), correlation)
+
+    def close(self):
+        try:
+            for future in self.futures:
+                future.result()
+        finally:
+            self.__executor.shutdown()
+            self.futures.clear()
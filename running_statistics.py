@@ -0,0 +1,154 @@
+import numpy as np
+
+
+def get_hashes(values: np.ndarray) -> np.ndarray:
+    keys = (np.asarray(values, dtype=np.float64) + 0.0).view(np.uint64)
+    with np.errstate(over='ignore'):
+        hashes = keys + np.uint64(0x9E3779B97F4A7C15)
+        hashes = (hashes ^ (hashes >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        hashes = (hashes ^ (hashes >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return hashes ^ (hashes >> np.uint64(31))
+
+
+class DistinctCountSketch:
+    precision: int
+    registers: np.ndarray
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values: np.ndarray):
+        hashes = get_hashes(values)
+        rank_bits = 64 - self.precision
+        indices = (hashes >> np.uint64(rank_bits)).astype(np.intp)
+        remainders = (hashes & np.uint64((1 << rank_bits) - 1)).astype(np.float64)
+        ranks = rank_bits - np.frexp(remainders)[1] + 1
+        np.maximum.at(self.registers, indices, ranks.astype(np.uint8))
+
+    def merge(self, other: 'DistinctCountSketch'):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def get_count(self) -> int:
+        registers_count = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / registers_count)
+        estimate = alpha * registers_count ** 2 / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zero_registers_count = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * registers_count and zero_registers_count != 0:
+            estimate = registers_count * np.log(registers_count / zero_registers_count)
+        return int(round(estimate))
+
+
+class QuantileSketch:
+    capacity: int
+    levels: list[np.ndarray]
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.levels = [np.empty(0)]
+        self.__offset = 0
+
+    def update(self, values: np.ndarray):
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self.__compact()
+
+    def merge(self, other: 'QuantileSketch'):
+        for level in range(len(other.levels)):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate((self.levels[level], other.levels[level]))
+        self.__compact()
+
+    def __compact(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self.capacity:
+                sorted_values = np.sort(self.levels[level])
+                leftover = len(sorted_values) % 2
+                promoted_values = sorted_values[self.__offset:len(sorted_values) - leftover:2]
+                self.__offset = 1 - self.__offset
+                self.levels[level] = sorted_values[len(sorted_values) - leftover:]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted_values))
+            level += 1
+
+    def get_quantile(self, quantile: float) -> float:
+        values = np.concatenate(self.levels)
+        if len(values) == 0:
+            return float('nan')
+        weights = np.concatenate([np.full(len(self.levels[level]), 2.0 ** level) for level in range(len(self.levels))])
+        order = np.argsort(values, kind='stable')
+        cumulative_weights = np.cumsum(weights[order])
+        rank = quantile * cumulative_weights[-1]
+        position = min(np.searchsorted(cumulative_weights, rank, side='left'), len(values) - 1)
+        return float(values[order][position])
+
+
+class RunningStatistics:
+    column_names: list[str]
+    rows_count: int
+    count: np.ndarray
+    mean: np.ndarray
+    squared_deviations_sum: np.ndarray
+    quantile_sketches: list[QuantileSketch]
+    distinct_count_sketches: list[DistinctCountSketch]
+
+    def __init__(self, column_names: list[str]):
+        columns_count = len(column_names)
+        self.column_names = column_names
+        self.rows_count = 0
+        self.count = np.zeros(columns_count, dtype=np.int64)
+        self.mean = np.zeros(columns_count)
+        self.squared_deviations_sum = np.zeros(columns_count)
+        self.quantile_sketches = [QuantileSketch() for _ in range(columns_count)]
+        self.distinct_count_sketches = [DistinctCountSketch() for _ in range(columns_count)]
+
+    def __combine_moments(self, count: np.ndarray, mean: np.ndarray, squared_deviations_sum: np.ndarray):
+        total_count = self.count + count
+        delta = mean - self.mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            combined_mean = np.where(total_count > 0, self.mean + delta * count / total_count, 0.0)
+            correction = np.where(total_count > 0, delta ** 2 * self.count * count / total_count, 0.0)
+        self.squared_deviations_sum = self.squared_deviations_sum + squared_deviations_sum + correction
+        self.mean = combined_mean
+        self.count = total_count
+
+    def update(self, chunk: np.ndarray):
+        chunk = np.asarray(chunk, dtype=np.float64).reshape(-1, len(self.column_names))
+        is_valid = ~np.isnan(chunk)
+        count = is_valid.sum(axis=0)
+        values = np.where(is_valid, chunk, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, values.sum(axis=0) / count, 0.0)
+        squared_deviations_sum = np.where(is_valid, (chunk - mean) ** 2, 0.0).sum(axis=0)
+
+        self.rows_count += len(chunk)
+        self.__combine_moments(count, mean, squared_deviations_sum)
+        for i in range(len(self.column_names)):
+            column_values = chunk[is_valid[:, i], i]
+            self.quantile_sketches[i].update(column_values)
+            self.distinct_count_sketches[i].update(column_values)
+
+    def merge(self, other: 'RunningStatistics'):
+        self.rows_count += other.rows_count
+        self.__combine_moments(other.count, other.mean, other.squared_deviations_sum)
+        for i in range(len(self.column_names)):
+            self.quantile_sketches[i].merge(other.quantile_sketches[i])
+            self.distinct_count_sketches[i].merge(other.distinct_count_sketches[i])
+
+    def get_missing_rate(self) -> list[float]:
+        return [round((1 - count / self.rows_count) * 100, 3) for count in self.count]
+
+    def get_mean(self) -> list[float]:
+        return [float(mean) if count else float('nan') for mean, count in zip(self.mean, self.count)]
+
+    def get_variance(self) -> list[float]:
+        return [float(np.sqrt(deviations / count)) if count else float('nan')
+                for deviations, count in zip(self.squared_deviations_sum, self.count)]
+
+    def get_quantile(self, number: int) -> list[float]:
+        return [sketch.get_quantile(number * 0.25) for sketch in self.quantile_sketches]
+
+    def get_unique_elements_count(self) -> list[int]:
+        return [sketch.get_count() for sketch in self.distinct_count_sketches]
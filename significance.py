@@ -0,0 +1,129 @@
+import warnings
+
+import numpy as np
+
+from gain_ratio import calculate_entropy, encode_target, get_class_indices, get_classes
+
+
+COUNTS_LIMIT = 1 << 22
+
+
+class GainRatioSignificance:
+    gain_ratio: float
+    p_value: float
+    lower_bound: float
+    upper_bound: float
+
+    def __init__(self, gain_ratio: float, p_value: float, lower_bound: float, upper_bound: float):
+        self.gain_ratio = gain_ratio
+        self.p_value = p_value
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+
+    def to_dict(self) -> dict:
+        return {'gain_ratio': self.gain_ratio, 'p_value': self.p_value,
+                'lower_bound': self.lower_bound, 'upper_bound': self.upper_bound}
+
+
+def get_input_indices(input_columns: list[np.ndarray], rows_count: int) -> tuple[np.ndarray, int]:
+    indices = np.empty((len(input_columns), rows_count), dtype=np.int64)
+    classes_count = 1
+    for i in range(len(input_columns)):
+        classes = get_classes(input_columns[i])
+        indices[i] = get_class_indices(input_columns[i], classes)
+        classes_count = max(classes_count, len(classes))
+    return indices, classes_count
+
+
+def count_cells(cell_indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    cell_indices = np.sort(cell_indices)
+    is_first = np.empty(len(cell_indices), dtype=bool)
+    is_first[:1] = True
+    is_first[1:] = cell_indices[1:] != cell_indices[:-1]
+    starts = np.flatnonzero(is_first)
+    return cell_indices[starts], np.diff(np.append(starts, len(cell_indices)))
+
+
+def calculate_batch_gain_ratios(input_indices: np.ndarray, classes_count: int, target_indices: np.ndarray,
+                                target_classes_count: int) -> np.ndarray:
+    batch_count, rows_count = target_indices.shape
+    columns_count = input_indices.shape[1]
+    groups_count = batch_count * columns_count * classes_count
+    class_indices = ((np.arange(batch_count)[:, np.newaxis, np.newaxis] * columns_count +
+                      np.arange(columns_count)[np.newaxis, :, np.newaxis]) * classes_count + input_indices)
+    is_input_valid = np.broadcast_to(input_indices >= 0, class_indices.shape)
+    input_freq = np.bincount(class_indices[is_input_valid], minlength=groups_count)
+
+    is_target_valid = target_indices >= 0
+    target_freq = np.bincount((np.arange(batch_count)[:, np.newaxis] * target_classes_count +
+                               target_indices)[is_target_valid], minlength=batch_count * target_classes_count)
+    target_info = calculate_entropy(target_freq.reshape(batch_count, target_classes_count), rows_count)
+
+    is_valid = is_input_valid & is_target_valid[:, np.newaxis, :]
+    cell_indices = class_indices * target_classes_count + target_indices[:, np.newaxis, :]
+    cells, cells_freq = count_cells(cell_indices[is_valid])
+    cells_classes = cells // target_classes_count
+    classes_capacity = np.bincount(cells_classes, weights=cells_freq, minlength=groups_count)
+    freq_logs = np.bincount(cells_classes, weights=cells_freq * np.log2(cells_freq), minlength=groups_count)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        classes_logs = np.where(classes_capacity > 0, classes_capacity * np.log2(input_freq), 0.0) - freq_logs
+        info_x = classes_logs.reshape(batch_count, columns_count, classes_count).sum(axis=-1) / rows_count
+        split = calculate_entropy(input_freq.reshape(batch_count, columns_count, classes_count), rows_count)
+        return (target_info[:, np.newaxis] - info_x) / split
+
+
+def get_batch_size(columns_count: int, rows_count: int) -> int:
+    return max(1, COUNTS_LIMIT // max(1, columns_count * rows_count))
+
+
+def calculate_permutation_gain_ratios(input_indices: np.ndarray, classes_count: int, target_indices: np.ndarray,
+                                      target_classes_count: int, permutations_count: int,
+                                      rng: np.random.Generator) -> np.ndarray:
+    batch_size = get_batch_size(*input_indices.shape)
+    ratios = [np.empty((0, len(input_indices)))]
+    for start in range(0, permutations_count, batch_size):
+        permuted_indices = rng.permuted(np.tile(target_indices, (min(batch_size, permutations_count - start), 1)),
+                                        axis=1)
+        ratios.append(calculate_batch_gain_ratios(input_indices[np.newaxis], classes_count, permuted_indices,
+                                                  target_classes_count))
+    return np.concatenate(ratios)
+
+
+def calculate_bootstrap_gain_ratios(input_indices: np.ndarray, classes_count: int, target_indices: np.ndarray,
+                                    target_classes_count: int, bootstrap_count: int,
+                                    rng: np.random.Generator) -> np.ndarray:
+    rows_count = len(target_indices)
+    batch_size = get_batch_size(*input_indices.shape)
+    ratios = [np.empty((0, len(input_indices)))]
+    for start in range(0, bootstrap_count, batch_size):
+        rows = rng.integers(0, rows_count, (min(batch_size, bootstrap_count - start), rows_count))
+        ratios.append(calculate_batch_gain_ratios(input_indices[:, rows].transpose(1, 0, 2), classes_count,
+                                                  target_indices[rows], target_classes_count))
+    return np.concatenate(ratios)
+
+
+def calculate_gain_ratio_significance(input_columns: dict[str, list[float]], target_columns,
+                                      permutations_count: int = 1000, bootstrap_count: int = 1000,
+                                      confidence: float = 0.95, seed: int = 0) -> dict[str, GainRatioSignificance]:
+    rng = np.random.default_rng(seed)
+    target = encode_target(target_columns)
+    columns = [np.asarray(column, dtype=np.float64) for column in input_columns.values()]
+    input_indices, classes_count = get_input_indices(columns, len(target.indices))
+
+    gain_ratios = calculate_batch_gain_ratios(input_indices[np.newaxis], classes_count, target.indices[np.newaxis],
+                                              target.classes_count)[0]
+
+    permutation_ratios = calculate_permutation_gain_ratios(input_indices, classes_count, target.indices,
+                                                           target.classes_count, permutations_count, rng)
+    p_values = (1 + np.sum(permutation_ratios >= gain_ratios - 1e-12, axis=0)) / (1 + permutations_count)
+
+    bootstrap_ratios = calculate_bootstrap_gain_ratios(input_indices, classes_count, target.indices,
+                                                       target.classes_count, bootstrap_count, rng)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        lower_bounds, upper_bounds = np.nanpercentile(bootstrap_ratios, [50 * (1 - confidence),
+                                                                         50 * (1 + confidence)], axis=0)
+    return {name: GainRatioSignificance(float(gain_ratios[i]), float(p_values[i]), float(lower_bounds[i]),
+                                        float(upper_bounds[i]))
+            for i, name in enumerate(input_columns.keys())}
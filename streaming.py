@@ -0,0 +1,92 @@
+from typing import Iterator
+
+import numpy as np
+
+import table_preparing as prep
+from running_statistics import RunningStatistics
+from table import Table
+from disk_table import DiskTable, create_disk_table
+
+
+def read_chunks(input_file, chunk_size: int, columns_count: int,
+                target_variables_count: int) -> Iterator[tuple[np.ndarray, int]]:
+    for chunk in prep.parse_chunks(input_file, columns_count, chunk_size):
+        data = prep.merge_kgf_columns(chunk)
+        is_significant = prep.get_significant_rows_mask(data, target_variables_count)
+        yield data[is_significant], int(len(data) - np.count_nonzero(is_significant))
+
+
+def scan_statistics(input_file, chunk_size: int, target_variables_count: int = 2) -> RunningStatistics:
+    column_names = prep.read_column_names(input_file)
+    statistics = RunningStatistics(column_names[:-1])
+    for chunk, _ in read_chunks(input_file, chunk_size, len(column_names), target_variables_count):
+        statistics.update(chunk)
+    return statistics
+
+
+def resize_rows(buffer: np.ndarray, columns_count: int, rows_count: int, capacity: int,
+                new_capacity: int) -> np.ndarray:
+    if new_capacity > capacity:
+        buffer.resize(new_capacity * columns_count, refcheck=False)
+        moved_columns = range(columns_count - 1, 0, -1)
+    else:
+        moved_columns = range(1, columns_count)
+    for i in moved_columns:
+        buffer[i * new_capacity:i * new_capacity + rows_count] = buffer[i * capacity:i * capacity + rows_count]
+    if new_capacity < capacity:
+        buffer.resize(new_capacity * columns_count, refcheck=False)
+    return buffer
+
+
+def get_matrix(buffer: np.ndarray, columns_count: int, capacity: int) -> np.ndarray:
+    return buffer.reshape((capacity, columns_count), order='F')
+
+
+def read_table(input_file, chunk_size: int,
+               target_variables_count: int = 2) -> tuple[Table, RunningStatistics, int]:
+    column_names = prep.read_column_names(input_file)
+    columns_count = len(column_names)
+    prep.log_merged_kgf(column_names[-2:])
+    column_names.pop()
+
+    statistics = RunningStatistics(list(column_names))
+    capacity = chunk_size
+    buffer = np.empty(capacity * len(column_names))
+    rows_count = 0
+    deleted_rows_count = 0
+    chunks_iterator = read_chunks(input_file, chunk_size, columns_count, target_variables_count)
+    for chunk, chunk_deleted_rows_count in chunks_iterator:
+        statistics.update(chunk)
+        if rows_count + len(chunk) > capacity:
+            new_capacity = max(capacity + capacity // 2, rows_count + len(chunk))
+            buffer = resize_rows(buffer, len(column_names), rows_count, capacity, new_capacity)
+            capacity = new_capacity
+        get_matrix(buffer, len(column_names), capacity)[rows_count:rows_count + len(chunk)] = chunk
+        rows_count += len(chunk)
+        deleted_rows_count += chunk_deleted_rows_count
+    prep.log_insignificant_rows(deleted_rows_count, target_variables_count, column_names)
+
+    buffer = resize_rows(buffer, len(column_names), rows_count, capacity, rows_count)
+    table = Table(get_matrix(buffer, len(column_names), rows_count), column_names, target_variables_count)
+    return table, statistics, deleted_rows_count
+
+
+def read_disk_table(input_file, path: str, chunk_size: int,
+                    target_variables_count: int = 2) -> tuple[DiskTable, int]:
+    column_names = prep.read_column_names(input_file)
+    columns_count = len(column_names)
+    prep.log_merged_kgf(column_names[-2:])
+    column_names.pop()
+
+    deleted_rows_counts = []
+
+    def get_chunks() -> Iterator[np.ndarray]:
+        for chunk, chunk_deleted_rows_count in read_chunks(input_file, chunk_size, columns_count,
+                                                           target_variables_count):
+            deleted_rows_counts.append(chunk_deleted_rows_count)
+            yield chunk
+
+    table = create_disk_table(path, column_names, get_chunks(), target_variables_count)
+    deleted_rows_count = sum(deleted_rows_counts)
+    prep.log_insignificant_rows(deleted_rows_count, target_variables_count, column_names)
+    return table, deleted_rows_count
@@ -1,49 +1,91 @@
 import csv
-
-from add import transpose
-from tabulate import tabulate
-from column import Column
-import pandas as pd
-import matplotlib.pyplot as plt
+from column import Column, calculate_matrix_characteristics
+import numpy as np
 import logging
-from math import isnan
 
 from add import print_list
+from filter_rule import FilterRule
+from preprocessing import Preprocessor
+from profiling import profiled
+from gain_ratio import calculate_gain_ratios, EQUAL_WIDTH
+from correlation import get_correlation_matrix
+from incremental_gain_ratio import IncrementalGainRatio
+from significance import GainRatioSignificance, calculate_gain_ratio_significance
+from imputation import FILLING_METHODS, KNN, STATISTIC, impute_knn
+from writers import get_chunks, write_csv
+from columnar import save_columns
+
+
+PRINTED_ROWS_LIMIT = 20
+PAGE_SIZE = 50
 
 
 class Table:
-    columns = []
+    columns: list[Column]
+    matrix: np.ndarray
     target_variables_count: int
     column_names: list[str]
+    filter_rules: list[FilterRule]
+    data_version: int
+    preprocessor: Preprocessor
 
-    def __init__(self, data: list[list[float]], column_names: list[str], target_variables_count: int):
+    def __init__(self, data: list[list[float]] | np.ndarray, column_names: list[str], target_variables_count: int):
         self.column_names = column_names
         self.target_variables_count = target_variables_count
-        transposed_data = transpose(data)
-        self.init_columns(transposed_data, column_names);
-
-    def init_columns(self, transposed_data, column_names):
-        self.columns.clear()
-        for i in range(len(transposed_data)):
-            current_column = Column(transposed_data[i], column_names[i])
-            self.columns.append(current_column)
+        self.filter_rules = []
+        self.data_version = 0
+        self.preprocessor = Preprocessor(column_names, target_variables_count)
+        self.__gain_ratio_cache = {}
+        self.matrix = np.asfortranarray(data, dtype=np.float64)
+        self.init_columns()
+
+    def invalidate(self):
+        self.data_version += 1
+        self.__gain_ratio_cache.clear()
+
+    def init_columns(self):
+        self.invalidate()
+        self.columns = [Column(self.matrix[:, i], self.column_names[i]) for i in range(len(self.column_names))]
+
+    def __bind_columns(self):
+        for i in range(len(self.columns)):
+            self.columns[i].data = self.matrix[:, i]
+
+    @profiled
+    def filter_rows(self, keep_mask: np.ndarray) -> np.ndarray:
+        if keep_mask.all():
+            return self.matrix[:0]
+        deleted_rows = self.matrix[~keep_mask]
+        self.matrix = np.asfortranarray(self.matrix[keep_mask])
+        for i in range(len(self.columns)):
+            self.columns[i].set_data(self.matrix[:, i])
+        self.invalidate()
+        return deleted_rows
 
-    def filter_column(self, column_name: str, predicate) -> list[list]:
+    @profiled
+    def filter_column(self, column_name: str, predicate) -> np.ndarray:
         column_index = self.column_names.index(column_name)
-        data = self.get_data()
-        rows = transpose(data)
-
-        deleted_rows = []
-        index = 0
-        while index < len(rows):
-            row = rows[index]
-            if isnan(row[-2]) and not predicate(row[column_index]):
-                deleted_rows.append(row)
-                rows.pop(index)
-                continue
-            index += 1
-        self.init_columns(transpose(rows), self.column_names)
-        return deleted_rows
+        is_satisfied = FilterRule(column_name, predicate).is_satisfied(self.matrix[:, column_index])
+        return self.filter_rows(~np.isnan(self.matrix[:, -2]) | is_satisfied)
+
+    def add_filter_rule(self, rule: FilterRule):
+        self.column_names.index(rule.column_name)
+        self.filter_rules.append(rule)
+
+    @profiled
+    def apply_filter_rules(self) -> list[tuple[FilterRule, int]]:
+        is_target_missing = np.isnan(self.matrix[:, -2])
+        keep_mask = np.ones(len(self.matrix), dtype=bool)
+        deleted_rows_count = []
+        for rule in self.filter_rules:
+            column = self.matrix[:, self.column_names.index(rule.column_name)]
+            is_deleted = keep_mask & is_target_missing & ~rule.is_satisfied(column)
+            deleted_rows_count.append((rule, int(np.count_nonzero(is_deleted))))
+            keep_mask &= ~is_deleted
+        self.preprocessor.filter_rules.extend(self.filter_rules)
+        self.filter_rules.clear()
+        self.filter_rows(keep_mask)
+        return deleted_rows_count
 
     def get_column_index(self, column_name : str):
         for i in range(len(self.columns)):
@@ -51,11 +93,10 @@ class Table:
             if column_name == column.get_name():
                 return i
 
-    def __get_dictionary(self) -> dict:
-        names = self.get_column_names()
-        data = self.get_data()
-        dictionary = {names[i]: data[i] for i in range(len(data))}
-        return dictionary
+    def __get_data_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.matrix, columns=self.get_column_names(), copy=False)
 
     def __filter_columns(self, predicate):
         deleted_columns = []
@@ -76,7 +117,9 @@ class Table:
         return self.columns[:-2]
 
     def figure_plot_correlation(self):
-        df = pd.DataFrame(self.__get_dictionary())
+        import matplotlib.pyplot as plt
+
+        df = self.__get_data_frame()
         f = plt.figure(figsize=(20, 15))
         plt.matshow(df.corr(), fignum=f.number)
         plt.xticks(range(df.shape[1]), df.columns, fontsize=14, rotation=90)
@@ -85,25 +128,25 @@ class Table:
         cb.ax.tick_params(labelsize=14)
         plt.show()
 
-    def get_correlation_table(self) -> list[list]:
-        df = pd.DataFrame(self.__get_dictionary())
-        d = df.corr().to_dict()
-        matrix = []
-        names = self.column_names
-        for name1 in names:
-            row = []
-            for name2 in names:
-                row.append(d[name1][name2])
-            matrix.append(row)
-        return matrix
-
-    def print_full_table(self):
-        output = tabulate(transpose(self.get_data()), self.get_column_names(), tablefmt="grid")
-        print(output)
+    def get_correlation_table(self) -> np.ndarray:
+        return get_correlation_matrix(self.matrix)
+
+    def print_full_table(self, rows_limit: int | None = PRINTED_ROWS_LIMIT, page_size: int = PAGE_SIZE):
+        from tabulate import tabulate
+
+        rows_count = len(self.matrix) if rows_limit is None else min(rows_limit, len(self.matrix))
+        for start in range(0, rows_count, page_size):
+            print(tabulate(self.matrix[start:min(start + page_size, rows_count)], self.get_column_names(),
+                           tablefmt="grid"))
+        if rows_count < len(self.matrix):
+            print(f"... {len(self.matrix) - rows_count} more rows")
 
     def get_column_names(self) -> list[str]:
         return [column.column_name for column in self.columns]
 
+    def get_shape(self) -> tuple[int, int]:
+        return self.matrix.shape
+
     def get_missing_rate(self) -> list[str]:
         return [column.missing_rate for column in self.columns]
 
@@ -119,9 +162,12 @@ class Table:
     def get_mean(self) -> list[str]:
         return [column.mean for column in self.columns]
 
-    def get_data(self) -> list[list]:
+    def get_data(self) -> list[np.ndarray]:
         return [column.data for column in self.columns]
 
+    def get_matrix(self) -> np.ndarray:
+        return self.matrix
+
     def get_upper_bound(self) -> list[list]:
         return [column.get_upper_bound() for column in self.columns]
 
@@ -131,14 +177,29 @@ class Table:
     def delete_column(self, index: int) -> Column:
         deleted_column = self.columns.pop(index)
         self.column_names.pop(index)
+        deleted_column.data = self.matrix[:, index].copy()
+        self.matrix = np.delete(self.matrix, index, axis=1)
+        self.__bind_columns()
+        self.invalidate()
         return deleted_column
 
-    def fill_missing_values(self):
+    def fill_missing_values(self, method: str = STATISTIC, neighbours_count: int = 5):
+        if method not in FILLING_METHODS:
+            raise ValueError(f"Unknown filling method '{method}', expected one of {FILLING_METHODS}")
+        self.invalidate()
+        columns = self.__get_off_target_variables()
+        filling_values = [None] * len(columns)
+        if method == KNN:
+            filling_values = impute_knn(self.matrix[:, :len(columns)], [column.is_fillable() for column in columns],
+                                        [column.missing_rate < 30 for column in columns],
+                                        [column.is_categorical for column in columns], neighbours_count)
         filled_columns = []
-        for column in self.__get_off_target_variables():
-            was_filled = column.fill_missing_values()
+        for column, values in zip(columns, filling_values):
+            filling_value = column.mode if column.is_categorical else column.mean
+            was_filled = column.fill_missing_values(filling_value if values is None else values)
             if was_filled:
                 filled_columns.append(column)
+                self.preprocessor.filling_values[column.column_name] = filling_value
         filled_columns_names = [column.column_name for column in filled_columns]
         logging.info(f"Missing values of columns {print_list(filled_columns_names, ', ')} were filled")
 
@@ -163,25 +224,55 @@ class Table:
         for column in self.columns:
             print(str(column.column_name) + ": " + str(column.get_lower_bound()) + " " + str(column.get_upper_bound()))
 
+    def calculate_characteristics(self):
+        characteristics = calculate_matrix_characteristics(self.matrix)
+        for i in range(len(self.columns)):
+            self.columns[i].set_characteristics({name: values[i].item() for name, values in characteristics.items()})
+
     def find_categorical_columns(self) -> list[str]:
+        self.calculate_characteristics()
         categorical_columns = [column.column_name for column in self.columns if column.is_categorical]
+        self.preprocessor.categorical_columns = categorical_columns
         logging.warning(f"Find {len(categorical_columns)} categorical columns (< 24% unique values): {print_list(categorical_columns, ', ')}")
         return categorical_columns
 
-    def get_target(self) -> list[tuple[float, float]]:
-        values = []
-        table_data = transpose(self.get_data()[-2:])
-        for row in table_data:
-            values.append((row[0], row[1]))
-        return values
+    def get_target(self) -> np.ndarray:
+        return self.matrix[:, -2:]
+
+    def get_gain_ratios(self, workers: int = 1, discretization: str = EQUAL_WIDTH) -> dict[str, float]:
+        columns = self.__get_off_target_variables()
+        uncached_columns = {column.column_name: column.data for column in columns
+                            if (column.column_name, self.data_version, discretization) not in self.__gain_ratio_cache}
+        if uncached_columns:
+            ratios = calculate_gain_ratios(uncached_columns, self.get_target(), workers, discretization)
+            for name, ratio in ratios.items():
+                self.__gain_ratio_cache[(name, self.data_version, discretization)] = ratio
+        return {column.column_name: self.__gain_ratio_cache[(column.column_name, self.data_version, discretization)]
+                for column in columns}
+
+    def get_gain_ratio_significance(self, permutations_count: int = 1000, bootstrap_count: int = 1000,
+                                    confidence: float = 0.95, seed: int = 0) -> dict[str, GainRatioSignificance]:
+        columns = {column.column_name: column.data for column in self.__get_off_target_variables()}
+        return calculate_gain_ratio_significance(columns, self.get_target(), permutations_count, bootstrap_count,
+                                                 confidence, seed)
+
+    def get_preprocessor(self) -> Preprocessor:
+        self.preprocessor.kept_columns = self.get_column_names()
+        return self.preprocessor
+
+    def get_gain_ratio_scorer(self) -> IncrementalGainRatio:
+        return IncrementalGainRatio([column.column_name for column in self.__get_off_target_variables()], self.matrix)
+
+    def save_in_file(self, filename: str):
+        write_csv(filename, self.get_column_names(), get_chunks(self.matrix))
 
-    def save_in_file(self, filename):
-        df = pd.DataFrame(self.__get_dictionary())
-        df.to_csv('out.csv', index=False)
+    def save_columns(self, path: str):
+        save_columns(path, self.get_column_names(), self.matrix)
 
     def normalize(self):
+        self.invalidate()
         for column in self.columns:
-            column.normalize()
+            self.preprocessor.normalization_bounds[column.column_name] = column.normalize()
 
 
 
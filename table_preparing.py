@@ -1,8 +1,18 @@
-from math import isnan
+import csv
+from itertools import islice
 import logging as log
+from typing import Iterator
+
+import numpy as np
+
 from add import print_list
 
 
+MISSING_VALUES = {'-', '#VALUE!', 'NaN', '', 'не спускался'}
+HEADER_ROWS_COUNT = 3
+SKIPPED_COLUMNS_COUNT = 2
+
+
 def get_data(table: list[list]) -> list:
     for i in range(3):
         table.pop(0)
@@ -11,7 +21,7 @@ def get_data(table: list[list]) -> list:
 
 
 def has_value(cell: str) -> bool:
-    return cell not in {'-', '#VALUE!', 'NaN', '', 'не спускался'}
+    return cell not in MISSING_VALUES
 
 
 def process_cell(cell: str) -> float:
@@ -28,44 +38,69 @@ def process_data(data: list[list[str]]) -> list:
     return prepared_data
 
 
-def merge_kgf(table: list[list], column_names: list[str]):
-    first_kgf_index = len(table[0]) - 2
-    second_kgf_index = len(table[0]) - 1
-    merged_columns_names = [column_names[first_kgf_index], column_names[second_kgf_index]]
-    log.info(f"Target columns {print_list(merged_columns_names, ' and ')} was merged")
+def read_column_names(input_file) -> list[str]:
+    header = list(csv.reader(islice(input_file, HEADER_ROWS_COUNT), delimiter=';'))
+    return numerate_elements(header[1][SKIPPED_COLUMNS_COUNT:])
+
+
+def read_data_frames(input_file, columns_count: int, missing_values: set[str], chunk_size: int | None):
+    import pandas as pd
+
+    return pd.read_csv(input_file, sep=';', header=None, decimal=',', low_memory=False,
+                       usecols=range(SKIPPED_COLUMNS_COUNT, SKIPPED_COLUMNS_COUNT + columns_count),
+                       na_values=sorted(missing_values), keep_default_na=False,
+                       float_precision='round_trip', chunksize=chunk_size)
+
+
+def get_float_matrix(data_frame) -> np.ndarray:
+    from pandas.api.types import is_numeric_dtype
 
-    for row in table:
-        if isnan(row[first_kgf_index]) and not isnan(row[second_kgf_index]):
-            row[first_kgf_index] = 1000 * row[second_kgf_index]
-    column_names.pop()
-    for row in table:
-        row.pop()
+    for name in data_frame.columns:
+        if not is_numeric_dtype(data_frame[name]):
+            data_frame[name] = data_frame[name].map(process_cell, na_action='ignore')
+    return data_frame.to_numpy(dtype=np.float64, na_value=np.nan)
 
 
-def is_significant_rows(row: list, target_variables_count: int) -> bool:
-    for element in row[-1 * target_variables_count:]:
-        if not isnan(element):
-            return True
-    return False
+def parse_data(input_file, columns_count: int, missing_values: set[str] = MISSING_VALUES) -> np.ndarray:
+    from pandas.errors import EmptyDataError
 
+    try:
+        data_frame = read_data_frames(input_file, columns_count, missing_values, None)
+    except EmptyDataError:
+        return np.empty((0, columns_count), order='F')
+    return np.asfortranarray(get_float_matrix(data_frame))
 
-def filter_rows(table: list[list], predicate) -> list:
-    deleted_rows = []
-    i = 0
-    while i < len(table):
-        if predicate(table[i]):
-            deleted_rows.append(table[i])
-            del table[i]
-        else:
-            i += 1
-    return deleted_rows
+
+def parse_chunks(input_file, columns_count: int, chunk_size: int,
+                 missing_values: set[str] = MISSING_VALUES) -> Iterator[np.ndarray]:
+    from pandas.errors import EmptyDataError
+
+    try:
+        data_frames = read_data_frames(input_file, columns_count, missing_values, chunk_size)
+    except EmptyDataError:
+        return
+    with data_frames:
+        for data_frame in data_frames:
+            yield get_float_matrix(data_frame)
+
+
+def merge_kgf_columns(data: np.ndarray) -> np.ndarray:
+    is_merged = np.isnan(data[:, -2]) & ~np.isnan(data[:, -1])
+    data[is_merged, -2] = 1000 * data[is_merged, -1]
+    return data[:, :-1]
+
+
+def get_significant_rows_mask(data: np.ndarray, target_variables_count: int) -> np.ndarray:
+    return ~np.isnan(data[:, -1 * target_variables_count:]).all(axis=1)
+
+
+def log_merged_kgf(merged_columns_names: list[str]):
+    log.info(f"Target columns {print_list(merged_columns_names, ' and ')} was merged")
 
 
-def delete_insignificant_rows(table: list[list], target_variables_count: int, column_names: list[str]) -> list[list]:
-    deleted_rows = filter_rows(table, lambda x: not is_significant_rows(x, target_variables_count))
-    log.info(f"{len(deleted_rows)} insignificant rows was deleted "
+def log_insignificant_rows(deleted_rows_count: int, target_variables_count: int, column_names: list[str]):
+    log.info(f"{deleted_rows_count} insignificant rows was deleted "
              f"(where values of {print_list(column_names[-1 * target_variables_count:], ' and ')} is a nan)")
-    return deleted_rows
 
 
 def numerate_elements(input_list: list[str]) -> list[str]:
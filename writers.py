@@ -0,0 +1,24 @@
+import csv
+from typing import Iterable, Iterator
+
+import numpy as np
+
+
+CHUNK_SIZE = 1 << 14
+
+
+def get_chunks(matrix: np.ndarray, chunk_size: int = CHUNK_SIZE) -> Iterator[np.ndarray]:
+    for start in range(0, len(matrix), chunk_size):
+        yield matrix[start:start + chunk_size]
+
+
+def format_cell(value: float) -> str:
+    return '' if value != value else repr(value)
+
+
+def write_csv(filename: str, column_names: list[str], chunks: Iterable[np.ndarray]):
+    with open(filename, 'w', newline='') as output_file:
+        writer = csv.writer(output_file, lineterminator='\n')
+        writer.writerow(column_names)
+        for chunk in chunks:
+            writer.writerows([format_cell(value) for value in row] for row in chunk.tolist())